@@ -0,0 +1,378 @@
+"""Localhost HTTP/JSON control API for a DownloadQueueManager.
+
+    POST   /jobs                {"url": ..., "urls": [...], "format": "mp4", "output": "...",
+                                 "rate_limit": "500K", "priority": 10}  -> {"queued": [ids]}
+    GET    /jobs                current per-job view (status, percent, speed, eta, ...)
+    DELETE /jobs/<id>           cancel a queued, running or processing job
+    POST   /jobs/<id>/pause     pause (a running job stops and keeps its partial file)
+    POST   /jobs/<id>/resume
+    POST   /jobs/<id>/priority  {"priority": 10}; higher runs first
+    GET    /events              server-sent events, one per queue signal
+    GET    /metrics             per-phase timing metrics, Prometheus text format
+
+Every request needs the session token, as ``Authorization: Bearer
+<token>`` (or ``?token=<token>`` on /events, for EventSource). The token
+is ``api_token`` from config.json or --token, else a new random one per
+run, logged at startup. POST bodies must be sent as application/json,
+and requests a browser makes from another site's page (a foreign
+``Origin``) are refused, so a web page can't drive the queue. ``output``
+must be the download folder or a folder under it.
+
+The API is plain HTTP: binding anything but a loopback address needs an
+explicit token, and anyone who can see the traffic can read it.
+
+Runs on its own asyncio loop. Queue signals only hop onto that loop via
+call_soon_threadsafe, so download workers never wait on HTTP clients;
+each event subscriber has a bounded queue and a slow one loses its
+oldest events instead of holding anything up.
+"""
+import asyncio
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote
+
+from downloader.bandwidth import parse_rate
+from downloader.queue_manager import PRIORITY_NORMAL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Per-subscriber backlog before old events are dropped.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Finished/failed/cancelled jobs kept in the /jobs view.
+MAX_DONE_JOBS = 1000
+
+DONE_STATUSES = ("Finished", "Failed", "Cancelled", "Removed", "Skipped")
+
+REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+    404: "Not Found", 405: "Method Not Allowed", 415: "Unsupported Media Type",
+}
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ControlServer:
+    def __init__(self, manager, signals, output_path, format_type="mp4",
+                 host=DEFAULT_HOST, port=DEFAULT_PORT, rate_limit=None, token=None):
+        if not token and not is_loopback(host):
+            raise ValueError(f"the control API needs a token to listen on {host}")
+
+        self.manager = manager
+        self.output_path = output_path
+        self.format_type = format_type
+        self.rate_limit = rate_limit
+        self.host = host
+        self.port = port
+        self.token_generated = not token
+        self.token = token or secrets.token_urlsafe(24)
+
+        self.loop = None
+        self.jobs = OrderedDict()   # job id -> job view; touched on the loop only
+        self.subscribers = set()
+
+        signals.status.connect(lambda message: self._post({"event": "status", "message": message}))
+        signals.queue_update.connect(
+            lambda status, job_id, title: self._post(
+                {"event": "queue_update", "status": status, "id": job_id, "title": title}
+            )
+        )
+        signals.renamed.connect(
+            lambda job_id, title: self._post({"event": "renamed", "id": job_id, "title": title})
+        )
+        signals.progress_batch.connect(lambda batch: self._post({"event": "progress", "jobs": batch}))
+        signals.finished.connect(
+            lambda job_id, title, playlist, index, details: self._post({
+                "event": "finished", "id": job_id, "title": title,
+                "playlist": playlist, "playlist_index": index, **details,
+            })
+        )
+
+    # ---------------- Running ----------------
+    def start(self):
+        """Serve on a daemon thread (used alongside the GUI)."""
+        ready = threading.Event()
+        threading.Thread(target=self.serve_forever, args=(ready,), name="control-api", daemon=True).start()
+        ready.wait()
+
+    def serve_forever(self, ready=None):
+        asyncio.run(self._serve(ready))
+
+    async def _serve(self, ready):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.token_generated:
+            logger.info(f"Control API listening on http://{self.host}:{self.port} (token {self.token})")
+        else:
+            logger.info(f"Control API listening on http://{self.host}:{self.port}")
+        if ready:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    # ---------------- Events ----------------
+    def _post(self, event):
+        # Called on worker threads: hand off and return immediately.
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event):
+        self._update_view(event)
+
+        data = f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(data)
+
+    def _update_view(self, event):
+        kind = event["event"]
+
+        if kind == "queue_update":
+            view = self.jobs.setdefault(event["id"], {"id": event["id"], "percent": 0.0})
+            view["title"] = event["title"]
+            view["status"] = event["status"]
+            if event["status"] in DONE_STATUSES:
+                self._prune()
+        elif kind == "renamed":
+            view = self.jobs.get(event["id"])
+            if view:
+                view["title"] = event["title"]
+        elif kind == "progress":
+            for job_id, state in event["jobs"].items():
+                view = self.jobs.get(job_id)
+                if view:
+                    view.update(state)
+        elif kind == "finished":
+            view = self.jobs.get(event["id"])
+            if view:
+                view.update(status="Finished", percent=100.0, playlist=event["playlist"],
+                            playlist_index=event["playlist_index"], files=event.get("files"))
+                self._prune()
+
+    def _prune(self):
+        done = [k for k, v in self.jobs.items() if v.get("status") in DONE_STATUSES]
+        for job_id in done[:max(0, len(done) - MAX_DONE_JOBS)]:
+            del self.jobs[job_id]
+
+    # ---------------- HTTP ----------------
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = request_line.split(" ", 2)
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            body = b""
+            length = int(headers.get("content-length") or 0)
+            if length:
+                body = await reader.readexactly(length)
+
+            path, _, query = target.partition("?")
+
+            status, error = self._check(method, path, query, headers)
+            if error:
+                await self._respond(writer, status, {"error": error})
+                return
+
+            if path == "/events" and method == "GET":
+                await self._stream_events(writer)
+                return
+
+            if path == "/metrics" and method == "GET" and self.manager.metrics:
+                await self._respond_text(writer, self.manager.metrics.prometheus_text())
+                return
+
+            status, payload = self._route(method, path, body)
+            await self._respond(writer, status, payload)
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            await self._respond(writer, 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    def _check(self, method, path, query, headers):
+        """Status and error for a request that must be refused, else (200, None)."""
+        # Browsers always send Origin on cross-site POSTs and EventSource;
+        # command-line clients don't send one.
+        origin = headers.get("origin")
+        if origin and origin not in self._origins():
+            return 403, "cross-origin requests are not allowed"
+
+        token = headers.get("authorization", "")
+        token = token[len("Bearer "):] if token.startswith("Bearer ") else ""
+        if not token and path == "/events":
+            token = (parse_qs(query).get("token") or [""])[0]
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            return 401, "missing or wrong token"
+
+        # Rules out the form and text/plain POSTs a page can send without
+        # a CORS preflight.
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if method == "POST" and content_type != "application/json":
+            return 415, "expected Content-Type: application/json"
+
+        return 200, None
+
+    def _origins(self):
+        hosts = {self.host, "localhost", "127.0.0.1", "[::1]"}
+        return {f"http://{host}:{self.port}" for host in hosts}
+
+    def _output(self, output):
+        """``output`` as an absolute path under the download folder, else None."""
+        root = os.path.realpath(self.output_path)
+        path = os.path.realpath(os.path.join(root, output))
+        try:
+            if os.path.commonpath([root, path]) == root:
+                return path
+        except ValueError:
+            # Different drives on Windows.
+            pass
+        return None
+
+    def _route(self, method, path, body):
+        if path == "/jobs":
+            if method == "GET":
+                return 200, {"jobs": list(self.jobs.values())}
+            if method == "POST":
+                return self._submit(json.loads(body or b"{}"))
+            return 405, {"error": "method not allowed"}
+
+        if path.startswith("/jobs/"):
+            job_id, _, action = unquote(path[len("/jobs/"):]).partition("/")
+            return self._control(method, job_id, action, body)
+
+        return 404, {"error": "not found"}
+
+    def _control(self, method, job_id, action, body):
+        if method == "DELETE" and not action:
+            ok = self.manager.cancel(job_id)
+        elif method == "POST" and action == "pause":
+            ok = self.manager.pause(job_id)
+        elif method == "POST" and action == "resume":
+            ok = self.manager.resume(job_id)
+        elif method == "POST" and action == "priority":
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict) or not isinstance(request.get("priority"), int):
+                return 400, {"error": "expected {\"priority\": <int>}"}
+            ok = self.manager.set_priority(job_id, request["priority"])
+        else:
+            return 405, {"error": "method not allowed"}
+
+        if ok:
+            return 200, {"id": job_id, action or "cancelled": True}
+        return 404, {"error": f"no such job (or not in a state that allows it): {job_id}"}
+
+    def _submit(self, request):
+        if not isinstance(request, dict):
+            return 400, {"error": "expected a JSON object"}
+
+        urls = request.get("urls") or []
+        if not isinstance(urls, list) or not all(isinstance(u, str) and u for u in urls):
+            return 400, {"error": "urls must be a list of strings"}
+        urls = list(urls)
+
+        url = request.get("url")
+        if url is not None and not isinstance(url, str):
+            return 400, {"error": "url must be a string"}
+        if url:
+            urls.append(url)
+        if not urls:
+            return 400, {"error": "url or urls required"}
+
+        output = request.get("output") or self.output_path
+        if not isinstance(output, str):
+            return 400, {"error": "output must be a string"}
+        output = self._output(output)
+        if output is None:
+            return 400, {"error": "output must be the download folder or a folder under it"}
+        fmt = request.get("format") or self.format_type
+        if fmt not in ("mp4", "mkv", "mp3"):
+            return 400, {"error": f"unsupported format: {fmt}"}
+
+        priority = request.get("priority", PRIORITY_NORMAL)
+        if not isinstance(priority, int):
+            return 400, {"error": f"invalid priority: {priority}"}
+
+        rate_limit = request.get("rate_limit") or self.rate_limit
+        try:
+            parse_rate(rate_limit)
+        except (ValueError, TypeError, AttributeError):
+            return 400, {"error": f"invalid rate_limit: {rate_limit}"}
+
+        ids = [
+            self.manager.add(url, output, fmt, rate_limit=rate_limit, priority=priority)
+            for url in urls
+        ]
+        return 202, {"queued": ids}
+
+    async def _respond(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _respond_text(self, writer, text):
+        body = text.encode("utf-8")
+        writer.write(
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _stream_events(self, writer):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: keep-alive\r\n\r\n"
+            )
+            # Start each subscriber with the current state.
+            snapshot = {"event": "snapshot", "jobs": list(self.jobs.values())}
+            writer.write(f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n".encode("utf-8"))
+            await writer.drain()
+
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    data = b": keep-alive\n\n"
+                writer.write(data)
+                await writer.drain()
+        finally:
+            self.subscribers.discard(queue)
@@ -0,0 +1,435 @@
+"""Pipeline benchmark: extraction, download, queue and history, fully offline.
+
+Starts a local HTTP server that serves generated media files and a small
+JSON API, which the stand-in extractors in ``benchmarks/yt_dlp_plugins``
+turn into ordinary yt-dlp info dicts. Against it, the benchmark drives
+get_video_info, download_video, a DownloadQueueManager (single videos and
+a playlist) and the history store, then appends one JSON record per
+invocation to ``benchmarks/results/pipeline.jsonl`` and prints the change
+against the previous record.
+
+Reported: extraction latency, time to first byte, per-job overhead (wall
+time minus time spent receiving media), throughput, queue jobs/s, UI
+signal rates and the process memory high-water mark after each stage.
+Downloads, caches and the history database go to a temporary folder
+that is removed afterwards.
+
+    python benchmarks/pipeline.py --jobs 40 --workers 4 --size 4M
+"""
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = ROOT / "benchmarks" / "results" / "pipeline.jsonl"
+
+sys.path.insert(0, str(ROOT))
+
+# Served media is this block repeated; contents don't matter to yt-dlp.
+_BLOCK = bytes(range(256)) * 256
+_CHUNK = len(_BLOCK)
+
+
+# -------------------------------
+# Local media server
+# -------------------------------
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, media_size, latency=0.0, playlist_size=0):
+        super().__init__(("127.0.0.1", 0), _MediaHandler)
+        self.media_size = media_size
+        self.latency = latency
+        self.playlist_size = playlist_size
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def video_url(self, video_id):
+        return f"{self.base}/bench/video/{video_id}"
+
+    def playlist_url(self, playlist_id):
+        return f"{self.base}/bench/playlist/{playlist_id}"
+
+
+class _MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:2] == ["api", "video"]:
+            video_id = parts[2].removesuffix(".json")
+            self._json({
+                "title": f"Benchmark video {video_id}",
+                "duration": 60,
+                "size": server.media_size,
+            })
+        elif parts[:2] == ["api", "playlist"]:
+            playlist_id = parts[2].removesuffix(".json")
+            self._json({
+                "title": f"Benchmark playlist {playlist_id}",
+                "entries": [f"{playlist_id}-{i:04d}" for i in range(server.playlist_size)],
+            })
+        elif parts[0] == "media":
+            self._media(server.media_size)
+        else:
+            self.send_error(404)
+
+    def _json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _media(self, size):
+        start = 0
+        requested = self.headers.get("Range", "")
+        if requested.startswith("bytes="):
+            start = int(requested[len("bytes="):].split("-")[0] or 0)
+
+        if start:
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(size - start))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        sent = start
+        try:
+            while sent < size:
+                n = min(_CHUNK, size - sent)
+                self.wfile.write(_BLOCK[:n])
+                sent += n
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+# -------------------------------
+# Helpers
+# -------------------------------
+def _parse_size(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _summary(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def _rss_high_water_mib():
+    """Peak resident set size of this process so far, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# -------------------------------
+# Stages
+# -------------------------------
+def bench_extract(server, count):
+    from downloader.download import get_video_info
+
+    uncached = []
+    for i in range(count):
+        started = time.perf_counter()
+        get_video_info(server.video_url(f"extract-{i:04d}"), use_cache=False)
+        uncached.append(time.perf_counter() - started)
+
+    # The queue resolves through the metadata cache; time a warm lookup.
+    url = server.video_url("extract-cached")
+    get_video_info(url)
+    cached = []
+    for _ in range(count):
+        started = time.perf_counter()
+        get_video_info(url)
+        cached.append(time.perf_counter() - started)
+
+    return {
+        "count": count,
+        "uncached_s": _summary(uncached),
+        "cached_s": _summary(cached),
+        "rss_high_water_mib": _rss_high_water_mib(),
+    }
+
+
+def bench_download(server, count, output):
+    """download_video one job at a time, with info resolved first as the queue does."""
+    from downloader.download import download_video, get_video_info
+
+    ttfb, overhead, walls, throughput = [], [], [], []
+    for i in range(count):
+        url = server.video_url(f"download-{i:04d}")
+        info = get_video_info(url)
+        seen = []
+
+        def on_progress(state):
+            if state.get("downloaded_bytes"):
+                seen.append(time.perf_counter())
+
+        started = time.perf_counter()
+        download_video(url, output, "mp4", progress_callback=on_progress, info=info)
+        wall = time.perf_counter() - started
+
+        walls.append(wall)
+        if seen:
+            receiving = seen[-1] - seen[0]
+            ttfb.append(seen[0] - started)
+            overhead.append(wall - receiving)
+            if receiving > 0:
+                throughput.append(server.media_size / receiving)
+
+    return {
+        "count": count,
+        "wall_s": _summary(walls),
+        "ttfb_s": _summary(ttfb),
+        "overhead_s": _summary(overhead),
+        "throughput_bytes_per_s": _summary(throughput),
+        "rss_high_water_mib": _rss_high_water_mib(),
+    }
+
+
+def bench_queue(server, urls, output, workers):
+    """Run ``urls`` through a DownloadQueueManager and watch its signals."""
+    from downloader.queue_manager import DownloadQueueManager
+    from downloader.signals import QueueSignals
+
+    signals = QueueSignals()
+    lock = threading.Lock()
+    events = {}
+    first_seen = {}
+    first_byte = {}
+    finished = []
+    failed = []
+    batch_sizes = []
+
+    def counter(name):
+        def slot(*args):
+            now = time.perf_counter()
+            with lock:
+                events[name] = events.get(name, 0) + 1
+                if name == "queue_update":
+                    status, job_id, _ = args
+                    first_seen.setdefault(job_id, now)
+                    if status == "Failed":
+                        failed.append(job_id)
+                elif name == "progress_batch":
+                    batch, = args
+                    batch_sizes.append(len(batch))
+                    for job_id, state in batch.items():
+                        if state.get("downloaded_bytes"):
+                            first_byte.setdefault(job_id, now)
+                elif name == "finished":
+                    finished.append(args[0])
+        return slot
+
+    for name in ("status", "queue_update", "renamed", "progress_batch", "finished"):
+        getattr(signals, name).connect(counter(name))
+
+    manager = DownloadQueueManager(signals, max_workers=workers)
+
+    started = time.perf_counter()
+    for url in urls:
+        job_id = manager.add(url, output, "mp4")
+        with lock:
+            first_seen.setdefault(job_id, time.perf_counter())
+    manager.wait()
+    elapsed = time.perf_counter() - started
+
+    ttfb = [first_byte[j] - first_seen[j] for j in first_byte if j in first_seen]
+    return {
+        "urls": len(urls),
+        "workers": workers,
+        "finished": len(finished),
+        "failed": len(failed),
+        "elapsed_s": elapsed,
+        "jobs_per_s": len(finished) / elapsed if elapsed else None,
+        "bytes_per_s": len(finished) * server.media_size / elapsed if elapsed else None,
+        "ttfb_s": _summary(ttfb),
+        "signals": events,
+        "signals_per_s": {name: count / elapsed for name, count in events.items()},
+        "jobs_per_progress_batch": statistics.mean(batch_sizes) if batch_sizes else None,
+        "rss_high_water_mib": _rss_high_water_mib(),
+    }
+
+
+def bench_history(count):
+    from history import add_history_entry, flush_history, query_history
+
+    started = time.perf_counter()
+    for i in range(count):
+        add_history_entry(
+            f"Benchmark video {i}", f"http://127.0.0.1/bench/video/history-{i:05d}", "mp4", "/tmp",
+            video_id=f"history-{i:05d}", extractor="bench:video",
+        )
+    queued = time.perf_counter() - started
+    flush_history()
+    written = time.perf_counter() - started
+
+    pages = []
+    for offset in range(0, min(count, 2000), 50):
+        t = time.perf_counter()
+        query_history(offset=offset, limit=50)
+        pages.append(time.perf_counter() - t)
+
+    lookups = []
+    for i in range(0, count, max(1, count // 100)):
+        t = time.perf_counter()
+        query_history(url=f"http://127.0.0.1/bench/video/history-{i:05d}")
+        lookups.append(time.perf_counter() - t)
+
+    return {
+        "count": count,
+        "add_calls_per_s": count / queued if queued else None,
+        "written_per_s": count / written if written else None,
+        "page_of_50_s": _summary(pages),
+        "url_lookup_s": _summary(lookups),
+        "rss_high_water_mib": _rss_high_water_mib(),
+    }
+
+
+# -------------------------------
+# Comparison
+# -------------------------------
+def _flatten(record, prefix=""):
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def _previous_record():
+    try:
+        with open(RESULTS, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except OSError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def compare(previous, record):
+    """Print the relative change of every numeric result against ``previous``."""
+    old = dict(_flatten(previous["results"]))
+    print(f"Change against {previous.get('revision')} ({previous.get('timestamp')}):")
+    for name, value in _flatten(record["results"]):
+        before = old.get(name)
+        if before:
+            print(f"  {name:55} {before:12.4g} -> {value:12.4g}  {(value - before) / before:+7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20, help="videos per stage")
+    parser.add_argument("--workers", type=int, default=4, help="queue max_workers")
+    parser.add_argument("--size", type=_parse_size, default="2M", help="bytes per media file (e.g. 512K, 4M)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every server response")
+    parser.add_argument("--history", type=int, default=5000, help="history entries written")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="yui-bench-"))
+    output = str(work / "downloads")
+
+    # Point every store at the scratch folder before anything uses it.
+    import history
+    from downloader import download
+    history.HISTORY_DB = work / "history.db"
+    history.HISTORY_FILE = work / "history.json"
+    download.metadata_cache.directory = work / "cache" / "info"
+
+    server = MediaServer(args.size, latency=args.latency, playlist_size=args.jobs)
+    threading.Thread(target=server.serve_forever, name="media-server", daemon=True).start()
+
+    results = {}
+    try:
+        # yt-dlp import and first YoutubeDL setup, paid once per process.
+        started = time.perf_counter()
+        download.get_video_info(server.video_url("warmup"), use_cache=False)
+        results["first_extract_s"] = time.perf_counter() - started
+
+        results["extract"] = bench_extract(server, args.jobs)
+        results["download"] = bench_download(server, args.jobs, output)
+        results["queue"] = bench_queue(
+            server, [server.video_url(f"queue-{i:04d}") for i in range(args.jobs)], output, args.workers,
+        )
+        results["playlist"] = bench_queue(server, [server.playlist_url("playlist")], output, args.workers)
+        results["history"] = bench_history(args.history)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "jobs": args.jobs,
+            "workers": args.workers,
+            "media_bytes": args.size,
+            "latency_s": args.latency,
+            "history_entries": args.history,
+        },
+        "results": results,
+    }
+
+    previous = _previous_record()
+
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    print(json.dumps(record, indent=4))
+    if previous and previous.get("config") == record["config"]:
+        compare(previous, record)
+
+
+if __name__ == "__main__":
+    main()
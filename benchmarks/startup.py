@@ -0,0 +1,126 @@
+"""Startup benchmark: time to first paint and per-module import time.
+
+Runs ``main.py`` in benchmark mode (YUI_STARTUP_BENCH=1, offscreen Qt by
+default) several times, plus once under ``python -X importtime``, and
+appends one JSON record per invocation to
+``benchmarks/results/startup.jsonl`` so results can be compared across
+commits. App data goes to a temporary folder (YUI_APP_DIR), so the real
+queue journal, history and library are left alone.
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = ROOT / "benchmarks" / "results" / "startup.jsonl"
+
+
+def _env(data_dir):
+    env = dict(os.environ)
+    env["YUI_STARTUP_BENCH"] = "1"
+    # History, library, archive and the queue journal go to a scratch
+    # folder, so the real queue is neither restored nor modified.
+    env["YUI_APP_DIR"] = data_dir
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def time_first_paint(data_dir):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "main.py"],
+        cwd=ROOT, env=_env(data_dir), capture_output=True, text=True, timeout=120,
+    )
+    wall = time.perf_counter() - started
+
+    for line in result.stdout.splitlines():
+        if line.startswith("YUI_FIRST_PAINT "):
+            return float(line.split()[1]), wall
+
+    raise RuntimeError(f"main.py did not report a first paint:\n{result.stderr[-2000:]}")
+
+
+def import_times(data_dir):
+    """Return {module: (self_us, cumulative_us)} from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "main.py"],
+        cwd=ROOT, env=_env(data_dir), capture_output=True, text=True, timeout=120,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue  # header line
+    return times
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules listed by cumulative import time")
+    args = parser.parse_args()
+
+    paints, walls = [], []
+    with tempfile.TemporaryDirectory(prefix="yui-startup-") as data_dir:
+        for _ in range(args.runs):
+            paint, wall = time_first_paint(data_dir)
+            paints.append(paint)
+            walls.append(wall)
+
+        times = import_times(data_dir)
+    top = sorted(times.items(), key=lambda kv: kv[1][1], reverse=True)[:args.top]
+    first_party = ("main", "ui", "downloader", "utils", "history", "settings")
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "first_paint_s": {
+            "median": statistics.median(paints),
+            "min": min(paints),
+            "max": max(paints),
+        },
+        "process_wall_s": statistics.median(walls),
+        "yt_dlp_imported_at_startup": any(name.split(".")[0] == "yt_dlp" for name in times),
+        "import_us_top": {name: cumulative for name, (_, cumulative) in top},
+        "import_us_first_party": {
+            name: cumulative for name, (_, cumulative) in times.items()
+            if name.split(".")[0] in first_party
+        },
+    }
+
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    print(json.dumps(record, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Stand-in extractors for benchmarks/pipeline.py.
+
+yt-dlp loads ``yt_dlp_plugins`` packages found on sys.path, and running
+``python benchmarks/pipeline.py`` puts ``benchmarks/`` there, so these
+handle the local media server's URLs:
+
+    http://127.0.0.1:<port>/bench/video/<id>
+    http://127.0.0.1:<port>/bench/playlist/<id>
+
+Metadata comes from the server's JSON API like a real site's would, so
+extraction still costs one HTTP round trip.
+"""
+from yt_dlp.extractor.common import InfoExtractor
+
+_BASE = r"(?P<base>https?://(?:127\.0\.0\.1|localhost):\d+)"
+
+
+class BenchVideoIE(InfoExtractor):
+    IE_NAME = "bench:video"
+    _VALID_URL = _BASE + r"/bench/video/(?P<id>[\w-]+)"
+
+    def _real_extract(self, url):
+        base, video_id = self._match_valid_url(url).group("base", "id")
+        meta = self._download_json(f"{base}/api/video/{video_id}.json", video_id)
+
+        return {
+            "id": video_id,
+            "title": meta["title"],
+            "duration": meta["duration"],
+            "formats": [{
+                "format_id": "bench",
+                "url": f"{base}/media/{video_id}.mp4",
+                "ext": "mp4",
+                "vcodec": "avc1.4d401f",
+                "acodec": "mp4a.40.2",
+                "width": 1280,
+                "height": 720,
+                "filesize": meta["size"],
+                "protocol": "http",
+            }],
+        }
+
+
+class BenchPlaylistIE(InfoExtractor):
+    IE_NAME = "bench:playlist"
+    _VALID_URL = _BASE + r"/bench/playlist/(?P<id>[\w-]+)"
+
+    def _real_extract(self, url):
+        base, playlist_id = self._match_valid_url(url).group("base", "id")
+        meta = self._download_json(f"{base}/api/playlist/{playlist_id}.json", playlist_id)
+
+        entries = [
+            self.url_result(f"{base}/bench/video/{video_id}", BenchVideoIE, video_id)
+            for video_id in meta["entries"]
+        ]
+        return self.playlist_result(entries, playlist_id, meta["title"])
@@ -0,0 +1,229 @@
+"""Headless downloader: runs the same queue engine as the GUI without Qt.
+
+    python cli.py URL [URL ...]
+    python cli.py -i urls.txt -f mp3 -j 8
+    cat urls.txt | python cli.py -i -
+    python cli.py --serve --port 8765      # also accept jobs over HTTP (see api.py)
+
+Progress is written to stdout as one JSON object per line (``event`` is
+one of status, queued, renamed, starting, processing, paused, retrying,
+failed, cancelled, skipped, removed, progress, finished; job events carry
+the job ``id``, and progress during FFmpeg work has ``"phase":
+"processing"``). The exit status is 1 if any job failed.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+
+from downloader.queue_manager import DownloadQueueManager, DEFAULT_MAX_WORKERS, DEFAULT_MAX_RETRIES
+from downloader.signals import QueueSignals
+from downloader.journal import QueueJournal
+from downloader.bandwidth import BandwidthScheduler, parse_rate, rate_setting, schedule_setting
+from downloader.postprocess import PostProcessingPool, DEFAULT_POSTPROCESS_WORKERS
+from downloader.archive import DownloadArchive
+from downloader.metrics import MetricsRegistry
+from downloader.profiling import JobProfiler, profiler_from_settings
+from downloader.download import ydl_pool
+from history import app_dir
+from settings import load_settings
+
+
+def read_urls(args):
+    urls = list(args.urls)
+
+    for path in args.input or []:
+        f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        with f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+
+    return urls
+
+
+class JsonLinesReporter:
+    """Writes every queue signal as a JSON line; safe to call from workers."""
+
+    def __init__(self, signals, out=sys.stdout):
+        self.out = out
+        self.lock = threading.Lock()
+        self.failed = 0
+
+        signals.status.connect(lambda message: self.write("status", message=message))
+        signals.queue_update.connect(self.on_queue_update)
+        signals.renamed.connect(lambda job_id, title: self.write("renamed", id=job_id, title=title))
+        signals.progress_batch.connect(self.on_progress)
+        signals.finished.connect(self.on_finished)
+
+    def write(self, event, **fields):
+        line = json.dumps({"event": event, **fields}, ensure_ascii=False)
+        with self.lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def on_queue_update(self, status, job_id, title):
+        if status == "Failed":
+            self.failed += 1
+        self.write(status.lower(), id=job_id, title=title)
+
+    def on_progress(self, batch):
+        for job_id, state in batch.items():
+            self.write("progress", id=job_id, **state)
+
+    def on_finished(self, job_id, title, playlist, index, details):
+        self.write("finished", id=job_id, title=title, playlist=playlist, playlist_index=index, **details)
+
+
+def main(argv=None):
+    settings = load_settings()
+
+    parser = argparse.ArgumentParser(description="Download videos without the GUI.")
+    parser.add_argument("urls", nargs="*", help="video or playlist URLs")
+    parser.add_argument("-i", "--input", action="append", metavar="FILE",
+                        help="read URLs from FILE, one per line ('-' for stdin); repeatable")
+    parser.add_argument("-o", "--output", default=settings.get("download_path", "downloads"),
+                        help="download folder")
+    parser.add_argument("-f", "--format", default="mp4", choices=["mp4", "mkv", "mp3"])
+    parser.add_argument("-j", "--jobs", type=int,
+                        default=settings.get("max_concurrent_downloads", DEFAULT_MAX_WORKERS),
+                        help="concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=settings.get("max_downloads_per_host"),
+                        help="max concurrent downloads per site")
+    parser.add_argument("--retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--ffmpeg-jobs", type=int,
+                        default=settings.get("max_postprocess_workers", DEFAULT_POSTPROCESS_WORKERS),
+                        help="concurrent FFmpeg merges/conversions")
+    parser.add_argument("--limit-rate", metavar="RATE", type=parse_rate,
+                        default=rate_setting(settings, "max_download_rate"),
+                        help="total bandwidth for all downloads, e.g. 2M (bytes/s)")
+    parser.add_argument("--job-limit-rate", metavar="RATE", type=parse_rate,
+                        default=rate_setting(settings, "max_job_rate"),
+                        help="bandwidth cap for each download, e.g. 500K")
+    parser.add_argument("--no-history", action="store_true",
+                        help="don't record finished downloads in the history store")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="download videos again even if they are in the download archive")
+    parser.add_argument("--import-archive", metavar="FILE",
+                        help="add the ids in a yt-dlp --download-archive FILE to the archive first")
+    parser.add_argument("--metrics", metavar="DIR",
+                        help="write per-phase timing metrics to DIR/metrics.json and DIR/metrics.prom")
+    parser.add_argument("--profile", metavar="DIR", nargs="?", const=os.path.join(app_dir(), "profiles"),
+                        help="profile each job's extraction and download; .prof files go to DIR "
+                             "and summaries to stderr (also on with YUI_PROFILE=1)")
+    parser.add_argument("--journal", metavar="FILE",
+                        help="persist the queue to FILE and resume its unfinished jobs first")
+    parser.add_argument("--serve", action="store_true",
+                        help="keep running and accept jobs over the localhost control API")
+    parser.add_argument("--host", default="127.0.0.1", help="control API address (with --serve)")
+    parser.add_argument("--port", type=int, default=settings.get("api_port") or 8765,
+                        help="control API port (with --serve)")
+    parser.add_argument("--token", default=settings.get("api_token"),
+                        help="control API token (with --serve; default: a new one each run). "
+                             "Required with a --host other than loopback")
+    args = parser.parse_args(argv)
+
+    urls = read_urls(args)
+    if not urls and not args.serve and not args.journal:
+        parser.error("no URLs given")
+    if args.serve and not args.token:
+        from api import is_loopback
+        if not is_loopback(args.host):
+            parser.error(f"--host {args.host} needs a --token (the API would be open to the network)")
+
+    signals = QueueSignals()
+    reporter = JsonLinesReporter(signals)
+
+    if not args.no_history:
+        from history import add_history_entry, flush_history
+
+        def record(job_id, title, playlist, index, details):
+            files = details.get("files") or []
+            add_history_entry(
+                f"{playlist} → {title}" if playlist else title,
+                details["url"],
+                details["format"],
+                details["folder"],
+                video_id=details.get("video_id"),
+                extractor=details.get("extractor"),
+                playlist=playlist,
+                playlist_index=index,
+                path=files[0]["path"] if files else None,
+            )
+
+        signals.finished.connect(record)
+
+    archive = None
+    if not args.no_archive:
+        archive = DownloadArchive(os.path.join(app_dir(), "archive.db"))
+        if args.import_archive:
+            archive.import_file(args.import_archive)
+
+    if args.profile:
+        profiler = JobProfiler(args.profile)
+    else:
+        profiler = profiler_from_settings(settings, os.path.join(app_dir(), "profiles"))
+    if profiler:
+        # stdout carries the JSON events; summaries go to stderr.
+        profile_log = logging.getLogger("downloader.profiling")
+        profile_log.addHandler(logging.StreamHandler(sys.stderr))
+        profile_log.setLevel(logging.INFO)
+
+    manager = DownloadQueueManager(
+        signals,
+        max_workers=args.jobs,
+        per_host_limit=args.per_host,
+        max_retries=args.retries,
+        journal=QueueJournal(args.journal) if args.journal else None,
+        bandwidth=BandwidthScheduler(args.limit_rate, schedule_setting(settings)),
+        postprocessor=PostProcessingPool(args.ffmpeg_jobs),
+        archive=archive,
+        metrics=MetricsRegistry(args.metrics),
+        profiler=profiler,
+        # stdout is reserved for the JSON events.
+        quiet=True,
+    )
+
+    server = None
+    if args.serve:
+        from api import ControlServer
+        server = ControlServer(
+            manager, signals, args.output, args.format, host=args.host, port=args.port,
+            rate_limit=args.job_limit_rate, token=args.token,
+        )
+        if server.token_generated:
+            reporter.write("status", message=f"Control API token: {server.token}")
+        # Subscribe before any job is added so no event is missed.
+        server.start()
+
+    if args.journal:
+        restored = manager.restore()
+        reporter.write("status", message=f"Restored {restored} unfinished jobs")
+
+    for url in urls:
+        manager.add(url, args.output, args.format, rate_limit=args.job_limit_rate)
+
+    try:
+        if server:
+            # Serve until interrupted.
+            threading.Event().wait()
+        else:
+            manager.wait()
+    except KeyboardInterrupt:
+        reporter.write("status", message="Interrupted")
+        return 130
+    finally:
+        manager.metrics.write()
+        manager.close()
+        ydl_pool.close()
+        if not args.no_history:
+            flush_history()
+
+    return 1 if reporter.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    key TEXT PRIMARY KEY,
+    url TEXT,
+    title TEXT
+) WITHOUT ROWID;
+"""
+
+
+def archive_key(extractor, video_id):
+    """yt-dlp's download-archive id: lower-cased extractor key, a space, the id."""
+    if not extractor or not video_id:
+        return None
+    return f"{extractor.lower()} {video_id}"
+
+
+class DownloadArchive:
+    """Set of already downloaded videos, keyed by extractor + video id.
+
+    Keys use the same ``"<extractor> <id>"`` form as yt-dlp's
+    ``--download-archive`` file, so such a file can be imported directly.
+    Lookups are answered from an in-memory set (loaded on first use);
+    additions also go to an SQLite table so the archive survives restarts.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._keys = None
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _loaded(self):
+        # Caller holds self._lock.
+        if self._keys is None:
+            self._keys = {row[0] for row in self._connect().execute("SELECT key FROM archive")}
+        return self._keys
+
+    def __contains__(self, key):
+        if key is None:
+            return False
+        with self._lock:
+            return key in self._loaded()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._loaded())
+
+    def contains(self, extractor, video_id):
+        return archive_key(extractor, video_id) in self
+
+    def add(self, extractor, video_id, url=None, title=None):
+        key = archive_key(extractor, video_id)
+        if key is None:
+            return
+
+        with self._lock:
+            self._loaded().add(key)
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archive (key, url, title) VALUES (?, ?, ?)",
+                (key, url, title),
+            )
+
+    def import_file(self, path):
+        """Merge a yt-dlp download-archive file; returns the number of new ids."""
+        keys = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                extractor, _, video_id = line.strip().partition(" ")
+                key = archive_key(extractor, video_id.strip())
+                if key:
+                    keys.append(key)
+
+        with self._lock:
+            known = self._loaded()
+            new = {k for k in keys if k not in known}
+            known.update(new)
+
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO archive (key) VALUES (?)", [(k,) for k in new])
+
+        logger.info(f"Imported {len(new)} ids from download archive {path}")
+        return len(new)
+
+    def export_file(self, path):
+        """Write every id in yt-dlp's download-archive format."""
+        with self._lock:
+            keys = sorted(self._loaded())
+        with open(path, "w", encoding="utf-8") as f:
+            for key in keys:
+                f.write(key + "\n")
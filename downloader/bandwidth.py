@@ -0,0 +1,271 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# How often shares are recomputed from what each job actually used.
+REBALANCE_INTERVAL = 1.0
+
+# A job may run this far ahead of its rate before it is made to wait.
+BURST_SECONDS = 0.5
+MIN_BURST = 16 * 1024
+
+# Longest single pause inside a progress hook; any remaining debt is
+# paid off on the next chunk, so cancellation is still noticed quickly.
+MAX_SLEEP = 1.0
+
+# Floor for a job that is currently using less than its share, so it can
+# grow back once its source speeds up.
+MIN_SHARE = 32 * 1024
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_rate(value):
+    """Bytes/s from a number or a string like "500K" / "2.5M"; None if unlimited."""
+    if value in (None, "", 0):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+
+    text = str(value).strip().upper().removesuffix("/S").removesuffix("B")
+    unit = text[-1:] if text[-1:] in _UNITS else ""
+    number = float(text[:len(text) - len(unit)])
+    return number * _UNITS[unit] if number > 0 else None
+
+
+def rate_setting(settings, key):
+    """parse_rate() of ``settings[key]``; a bad value is logged and means unlimited."""
+    try:
+        return parse_rate(settings.get(key))
+    except (ValueError, TypeError, AttributeError):
+        logger.error(f"Ignoring invalid {key} in settings: {settings.get(key)!r}")
+        return None
+
+
+def schedule_setting(settings, key="bandwidth_schedule"):
+    """The windows in ``settings[key]`` that parse; bad ones are logged and skipped."""
+    windows = []
+    for window in settings.get(key) or []:
+        try:
+            _window(window)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            logger.error(f"Ignoring invalid {key} window in settings: {window!r}")
+            continue
+        windows.append(window)
+    return windows
+
+
+def scheduler_from_settings(settings):
+    """A BandwidthScheduler for ``max_download_rate`` and ``bandwidth_schedule``.
+
+    A typo in either only drops that value, so it never stops the app
+    from starting.
+    """
+    return BandwidthScheduler(rate_setting(settings, "max_download_rate"), schedule_setting(settings))
+
+
+def _window(window):
+    return _minutes(window["start"]), _minutes(window["end"]), parse_rate(window.get("limit"))
+
+
+def _minutes(hhmm):
+    hours, _, minutes = hhmm.partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def _fair_shares(budget, demands):
+    """Max-min fair split of ``budget`` over ``{key: demand}``.
+
+    Jobs that want less than an even share get what they want; the rest
+    is split evenly among the others.
+    """
+    shares = {}
+    remaining = dict(demands)
+
+    while remaining:
+        even = budget / len(remaining)
+        satisfied = {k: d for k, d in remaining.items() if d <= even}
+        if not satisfied:
+            for k in remaining:
+                shares[k] = even
+            break
+        for k, d in satisfied.items():
+            shares[k] = d
+            budget -= d
+            del remaining[k]
+
+    return shares
+
+
+class Throttle:
+    """Token bucket for one running download; see BandwidthScheduler."""
+
+    def __init__(self, scheduler, cap):
+        self.scheduler = scheduler
+        self.cap = cap
+        self.rate = cap           # bytes/s, None = unlimited
+
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._last = time.monotonic()
+
+        # Bytes since the last rebalance, to see whether the share is used.
+        self.window_bytes = 0
+        self.window_start = self._last
+
+        # Set by wake() to cut a pause short (job paused or cancelled).
+        self._wake = threading.Event()
+
+    @property
+    def limited(self):
+        """Whether a rate may apply to this job at some point."""
+        return self.cap is not None or self.scheduler.may_limit()
+
+    def consume(self, nbytes):
+        """Account for ``nbytes`` just received; sleeps if over the rate."""
+        if nbytes <= 0:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self.window_bytes += nbytes
+            rate = self.rate
+            if rate is not None:
+                burst = max(rate * BURST_SECONDS, MIN_BURST)
+                self._tokens = min(burst, self._tokens + (now - self._last) * rate)
+                self._tokens -= nbytes
+            self._last = now
+            debt = -self._tokens if rate is not None and self._tokens < 0 else 0
+
+        self.scheduler._maybe_rebalance(now)
+
+        if debt and self._wake.wait(min(debt / rate, MAX_SLEEP)):
+            self._wake.clear()
+
+    def wake(self):
+        """Return from a pause in consume() now, so the hook can see a pause or cancel."""
+        self._wake.set()
+
+    def _set_rate(self, rate):
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is not None:
+                # Settle the bucket at the old rate before switching.
+                burst = max(self.rate * BURST_SECONDS, MIN_BURST)
+                self._tokens = min(burst, self._tokens + (now - self._last) * self.rate)
+            else:
+                self._tokens = 0.0
+            self._last = now
+            self.rate = rate
+
+    def _take_window(self, now):
+        """Rate used since the last call, or None if too little time passed."""
+        with self._lock:
+            elapsed = now - self.window_start
+            if elapsed < REBALANCE_INTERVAL / 2:
+                return None
+            used = self.window_bytes / elapsed
+            self.window_bytes = 0
+            self.window_start = now
+        return used
+
+
+class BandwidthScheduler:
+    """Global download budget shared by every running job.
+
+    ``limit`` is the total in bytes/s (None = unlimited). ``schedule`` is a
+    list of ``{"start": "HH:MM", "end": "HH:MM", "limit": ...}`` windows
+    (end may wrap past midnight); the first one covering the current time
+    overrides ``limit``, so ``{"start": "22:00", "end": "07:00", "limit":
+    null}`` lifts the cap overnight.
+
+    Each running job holds a Throttle whose rate is its share of the
+    budget: jobs under a per-job cap, or currently using less than their
+    share, keep only what they need and the rest is split among the
+    others. Shares are recomputed as jobs start and finish, and about once
+    a second from what each job actually used. Limits take effect in the
+    download's progress hook, so they apply regardless of which yt-dlp
+    downloader (HTTP, fragments) is in use.
+    """
+
+    def __init__(self, limit=None, schedule=None):
+        self.limit = parse_rate(limit)
+        self.schedule = [_window(w) for w in schedule or []]
+
+        self._lock = threading.Lock()
+        self._throttles = {}
+        self._next_rebalance = 0.0
+
+    def current_limit(self, now=None):
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        for start, end, limit in self.schedule:
+            inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if inside:
+                return limit
+        return self.limit
+
+    def may_limit(self):
+        """Whether a global limit applies now or in some schedule window."""
+        return self.limit is not None or any(limit is not None for _, _, limit in self.schedule)
+
+    def register(self, key, cap=None):
+        """Start metering a job; ``cap`` is an optional per-job limit."""
+        throttle = Throttle(self, parse_rate(cap))
+        with self._lock:
+            self._throttles[key] = throttle
+            self._rebalance(time.monotonic(), fresh=key)
+        return throttle
+
+    def wake(self, key):
+        with self._lock:
+            throttle = self._throttles.get(key)
+        if throttle is not None:
+            throttle.wake()
+
+    def unregister(self, key):
+        with self._lock:
+            if self._throttles.pop(key, None) is not None:
+                self._rebalance(time.monotonic())
+
+    def _maybe_rebalance(self, now):
+        if now < self._next_rebalance:
+            return
+        with self._lock:
+            if now >= self._next_rebalance:
+                self._rebalance(now)
+
+    def _rebalance(self, now, fresh=None):
+        # Caller holds self._lock.
+        self._next_rebalance = now + REBALANCE_INTERVAL
+        limit = self.current_limit()
+
+        demands = {}
+        for key, throttle in self._throttles.items():
+            demand = throttle.cap if throttle.cap is not None else float("inf")
+            used = throttle._take_window(now)
+            # A job that could not use its share (slow source) only keeps
+            # what it needs plus headroom; a new job starts with a full share.
+            if used is not None and key != fresh and throttle.rate is not None \
+                    and used < throttle.rate * 0.8:
+                demand = min(demand, max(used * 1.5, MIN_SHARE))
+            demands[key] = demand
+
+        if limit is None:
+            # No budget to share: only per-job caps apply.
+            shares = {k: t.cap for k, t in self._throttles.items()}
+        else:
+            shares = _fair_shares(limit, demands)
+
+        for key, share in shares.items():
+            self._throttles[key]._set_rate(share)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": self.current_limit(),
+                "jobs": {key: t.rate for key, t in self._throttles.items()},
+            }
@@ -1,49 +1,355 @@
-import yt_dlp
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
+from downloader.ydl_pool import YoutubeDLPool
+from downloader.archive import archive_key
+
+logger = logging.getLogger(__name__)
+
+
+def _app_dir():
+    if os.environ.get("YUI_APP_DIR"):
+        return os.environ["YUI_APP_DIR"]
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# -------------------------------
+# Metadata cache
+# -------------------------------
+class MetadataCache:
+    """In-memory LRU of info dicts, backed by one JSON file per URL on disk.
+
+    Entries older than ``ttl`` seconds are treated as misses on both levels,
+    since the stream URLs inside an info dict expire after a few hours.
+    """
+
+    def __init__(self, directory, ttl=1800, max_memory_entries=128, max_disk_entries=1000):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (stored_at, json text); text is decoded per hit so callers
+        # can mutate the returned dict freely.
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.strip().encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, url):
+        key = self._key(url)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            if entry:
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if now - stored_at < self.ttl:
+                text = path.read_text(encoding="utf-8")
+                info = json.loads(text)
+                with self._lock:
+                    self._remember(key, stored_at, text)
+                    self.disk_hits += 1
+                return info
+            path.unlink()
+        except (OSError, ValueError):
+            pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, url, info):
+        key = self._key(url)
+        text = json.dumps(info, ensure_ascii=False)
+
+        with self._lock:
+            self._remember(key, time.time(), text)
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, self._path(key))
+            self._prune_disk()
+        except OSError as e:
+            logger.debug(f"Could not write metadata cache entry: {e}")
+
+    def _remember(self, key, stored_at, text):
+        self._memory[key] = (stored_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune_disk(self):
+        files = list(self.directory.glob("*.json"))
+        if len(files) <= self.max_disk_entries:
+            return
+
+        files.sort(key=lambda f: f.stat().st_mtime)
+        for f in files[:len(files) - self.max_disk_entries]:
+            try:
+                f.unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+metadata_cache = MetadataCache(Path(_app_dir()) / "cache" / "info")
+
+
+def metadata_cache_stats():
+    return metadata_cache.stats()
+
+
+# Shared by metadata lookups, previews and downloads.
+ydl_pool = YoutubeDLPool()
 
 
 # -------------------------------
 # Fetch metadata only
 # -------------------------------
-def get_video_info(url):
+def get_video_info(url, use_cache=True, flat_playlist=False):
+    """Return the yt-dlp info dict for ``url``.
+
+    With ``flat_playlist`` a playlist's entries are left as lightweight
+    url results instead of being resolved one by one; single videos are
+    resolved fully either way.
+    """
+    # A fully resolved entry is good enough for a flat lookup too, so
+    # videos always live under the plain URL and only flat playlists
+    # get their own key.
+    flat_key = f"{url}#flat"
+
+    if use_cache:
+        keys = [url, flat_key] if flat_playlist else [url]
+        for key in keys:
+            info = metadata_cache.get(key)
+            if info is not None:
+                logger.debug(f"Metadata cache hit: {url}")
+                return info
+
     ydl_opts = {
         "quiet": True,
         "skip_download": True,
-        "extract_flat": False,
+        "extract_flat": "in_playlist" if flat_playlist else False,
         "noplaylist": False,
         "cookiefile": "cookies.txt",
         "js_runtimes": {"node": {}},
         "remote_components": ["ejs:github"],
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with ydl_pool.lease(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=False)
+        info = ydl.sanitize_info(info)
+
+    if use_cache:
+        is_playlist = info.get("_type") == "playlist"
+        metadata_cache.put(flat_key if flat_playlist and is_playlist else url, info)
 
     return info
 
 
+_extractor_classes = None
+
+
+def url_archive_key(url):
+    """Download-archive key for ``url`` from the URL alone, or None.
+
+    Like yt-dlp's own archive check, this matches the URL against the
+    extractors and takes the id from it without any network request.
+    """
+    global _extractor_classes
+    if _extractor_classes is None:
+        from yt_dlp.extractor import gen_extractor_classes
+        _extractor_classes = list(gen_extractor_classes())
+
+    for ie in _extractor_classes:
+        if ie.suitable(url):
+            if ie.ie_key() == "Generic":
+                return None
+            return archive_key(ie.ie_key(), ie.get_temp_id(url))
+    return None
+
+
+# -------------------------------
+# Streaming preview
+# -------------------------------
+PREVIEW_ENTRY_FIELDS = ("id", "title", "url", "duration")
+
+
+def iter_preview(url, page_size=50):
+    """Yield ``(info, entries)`` pairs for a preview of ``url``.
+
+    A single video yields its full info dict once with ``entries`` set to
+    None. A playlist yields its header (the info dict without entries)
+    with successive pages of slim, flat entries, so the first page shows
+    up after one request and nothing beyond the current page is kept.
+    """
+    cached = metadata_cache.get(url)
+    if cached is not None:
+        yield from _paged(cached, cached.get("entries") or [], page_size)
+        return
+
+    ydl_opts = {
+        "quiet": True,
+        "skip_download": True,
+        "extract_flat": "in_playlist",
+        "lazy_playlist": True,
+        "noplaylist": False,
+        "cookiefile": "cookies.txt",
+        "js_runtimes": {"node": {}},
+        "remote_components": ["ejs:github"],
+    }
+
+    with ydl_pool.lease(ydl_opts) as ydl:
+        # process=False leaves a playlist's entries as the extractor's
+        # lazy generator instead of walking every page up front.
+        info = ydl.extract_info(url, download=False, process=False)
+        while info.get("_type") in ("url", "url_transparent"):
+            info = ydl.extract_info(
+                info["url"], download=False, process=False, ie_key=info.get("ie_key")
+            )
+
+        if info.get("_type") != "playlist":
+            info = ydl.sanitize_info(ydl.process_ie_result(info, download=False))
+            metadata_cache.put(url, info)
+            yield info, None
+            return
+
+        yield from _paged(info, info.get("entries") or [], page_size)
+
+
+def _paged(info, entries, page_size):
+    if info.get("_type") != "playlist":
+        yield info, None
+        return
+
+    header = {k: v for k, v in info.items() if k != "entries"}
+    page = []
+
+    for entry in entries:
+        if not entry:
+            continue
+        page.append({k: entry.get(k) for k in PREVIEW_ENTRY_FIELDS})
+        if len(page) >= page_size:
+            yield header, page
+            page = []
+
+    if page:
+        yield header, page
+
+
 # -------------------------------
 # Download logic
 # -------------------------------
-def download_video(
-    url,
-    output_path="downloads",
-    format_type="mp4",
-    progress_callback=None,
-    status_callback=None,
-    finished_callback=None,
-):
-    Path(output_path).mkdir(exist_ok=True)
+def _base_opts(output_path, quiet=False):
+    return {
+        "outtmpl": f"{output_path}/%(title)s.%(ext)s",
+        # Headless callers own stdout; yt-dlp's own messages stay off it
+        # (warnings and errors still go to stderr).
+        "quiet": quiet,
+        "noprogress": quiet,
+        # Keep .part files and resume them, so a job restored from the
+        # queue journal continues where it stopped.
+        "continuedl": True,
+        "nopart": False,
+        "noplaylist": False,
+        "cookiefile": "cookies.txt",
+        "js_runtimes": {"node": {}},
+        "remote_components": ["ejs:github"],
+    }
+
+
+# Read size while a bandwidth limit may apply. yt-dlp otherwise grows its
+# blocks to several MiB, and the throttle (which only sees whole blocks)
+# turns that into bursts followed by long sleeps.
+THROTTLED_BUFFER_SIZE = 64 * 1024
+
+
+def _throttle_opts(throttle):
+    if throttle is None or not throttle.limited:
+        return {}
+    return {"buffersize": THROTTLED_BUFFER_SIZE, "noresizebuffer": True}
+
+
+# Format selection per target format.
+FORMAT_SPECS = {
+    "mp4": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+    "mkv": "bestvideo+bestaudio/best",
+    "mp3": "bestaudio/best",
+}
+
+
+def _progress_hook(progress_callback=None, status_callback=None, finished_callback=None, throttle=None,
+                   phase_callback=None, after_phase=None):
+    # Bytes seen so far per file, to turn cumulative counts into chunks.
+    received = {}
+    phase = [None]
+
+    def enter(name):
+        if phase_callback and name and phase[0] != name:
+            phase[0] = name
+            phase_callback(name)
 
     def hook(d):
-        # Progress %
+        if d["status"] == "downloading":
+            enter("transfer")
+        elif d["status"] == "finished":
+            # Whatever follows the last finished file inside the same
+            # call is yt-dlp's own merge/conversion.
+            enter(after_phase)
+
+        # Progress %, plus the raw numbers for speed/ETA display
         if progress_callback and d["status"] == "downloading":
             total = d.get("total_bytes") or d.get("total_bytes_estimate")
             downloaded = d.get("downloaded_bytes", 0)
 
-            if total:
-                progress = downloaded / total * 100
-                progress_callback(progress)
+            # Reported even without a size (live streams, some fragmented
+            # formats) so bytes and speed are still counted.
+            progress_callback({
+                "percent": downloaded / total * 100 if total else None,
+                "filename": d.get("filename"),
+                "downloaded_bytes": downloaded,
+                "total_bytes": total,
+                "speed": d.get("speed"),
+                "eta": d.get("eta"),
+            })
 
         # Playlist progress
         if d.get("status") == "downloading":
@@ -55,8 +361,24 @@ def download_video(
                     f"Downloading video {index} / {total_entries}"
                 )
 
+        if throttle and d["status"] == "downloading":
+            name = d.get("filename")
+            downloaded = d.get("downloaded_bytes") or 0
+            # The first report of a resumed .part file includes what was
+            # already on disk; only count bytes received from then on.
+            if name in received:
+                throttle.consume(downloaded - received[name])
+            received[name] = downloaded
+
         if d["status"] == "finished":
-            progress_callback and progress_callback(100)
+            progress_callback and progress_callback({
+                "percent": 100,
+                "filename": d.get("filename"),
+                "downloaded_bytes": d.get("downloaded_bytes"),
+                "total_bytes": d.get("total_bytes"),
+                "speed": None,
+                "eta": 0,
+            })
 
             #Log individual playlist entries
             info = d.get("info_dict", {})
@@ -68,29 +390,59 @@ def download_video(
             if finished_callback and title:
                 finished_callback(title, playlist, playlist_index)
 
-    ydl_opts = {
-        "outtmpl": f"{output_path}/%(title)s.%(ext)s",
-        "progress_hooks": [hook],
-        "noplaylist": False,
-        "cookiefile": "cookies.txt",
-        "js_runtimes": {"node": {}},
-        "remote_components": ["ejs:github"],
-    }
+    return hook
 
-    # ---------------- Format selection ----------------
-    if format_type == "mp4":
-        ydl_opts["format"] = (
-            "bestvideo[ext=mp4]+bestaudio[ext=m4a]/"
-            "best[ext=mp4]/best"
-        )
-        ydl_opts["merge_output_format"] = "mp4"
 
-    elif format_type == "mkv":
-        ydl_opts["format"] = "bestvideo+bestaudio/best"
-        ydl_opts["merge_output_format"] = "mkv"
+def download_video(
+    url,
+    output_path="downloads",
+    format_type="mp4",
+    progress_callback=None,
+    status_callback=None,
+    finished_callback=None,
+    info=None,
+    info_file=None,
+    throttle=None,
+    phase_callback=None,
+    quiet=False,
+):
+    """Download ``url`` in ``format_type``, merging/converting inline.
+
+    ``progress_callback`` receives a dict with percent, filename,
+    downloaded_bytes, total_bytes, speed (bytes/s) and eta (seconds);
+    percent and total_bytes are None while the size is unknown.
+
+    Pass an already-resolved ``info`` dict (as returned by get_video_info)
+    or an ``info_file`` written by yt-dlp's --write-info-json to skip the
+    extraction step and go straight to format selection.
+
+    ``throttle`` (a bandwidth.Throttle) is told about every chunk received
+    and holds the download back while it is over its share of bandwidth.
+
+    ``phase_callback`` is called with "extract", "transfer", "merge" or
+    "postprocess" as the download moves between those phases (for
+    per-phase timing; see downloader.metrics).
+
+    ``quiet`` keeps yt-dlp's status lines and progress bar off stdout.
+
+    Returns one dict per file written (path, title, url, video_id,
+    duration, format).
+    """
+    Path(output_path).mkdir(exist_ok=True)
+
+    hook = _progress_hook(
+        progress_callback, status_callback, finished_callback, throttle,
+        phase_callback, after_phase="postprocess" if format_type == "mp3" else "merge",
+    )
+
+    ydl_opts = {**_base_opts(output_path, quiet), **_throttle_opts(throttle)}
+    ydl_opts["format"] = FORMAT_SPECS[format_type]
+
+    # ---------------- Format selection ----------------
+    if format_type in ("mp4", "mkv"):
+        ydl_opts["merge_output_format"] = format_type
 
     elif format_type == "mp3":
-        ydl_opts["format"] = "bestaudio/best"
         ydl_opts["postprocessors"] = [
             {
                 "key": "FFmpegExtractAudio",
@@ -100,5 +452,147 @@ def download_video(
         ]
 
     # ---------------- Download ----------------
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
+    if info_file:
+        with open(info_file, "r", encoding="utf-8") as f:
+            info = json.load(f)
+
+    with ydl_pool.lease(ydl_opts, progress_hooks=[hook]) as ydl:
+        if info:
+            result = _download_from_info(ydl, info, url)
+        else:
+            if phase_callback:
+                phase_callback("extract")
+            result = ydl.extract_info(url, download=True)
+
+    return downloaded_files(result)
+
+
+def download_streams(
+    url,
+    output_path="downloads",
+    format_type="mp4",
+    progress_callback=None,
+    info=None,
+    throttle=None,
+    phase_callback=None,
+    quiet=False,
+):
+    """Download the streams for ``format_type`` without running FFmpeg.
+
+    Returns ``(files, task)``. ``task`` is the FFmpeg work still needed to
+    produce ``files`` (see downloader.postprocess.run_task), or None when
+    the download is already final. ``phase_callback`` and ``quiet`` are
+    as for download_video. Playlists that reach here unexpanded are downloaded
+    with download_video instead.
+    """
+    Path(output_path).mkdir(exist_ok=True)
+
+    select_opts = {**_base_opts(output_path, quiet=True), "format": FORMAT_SPECS[format_type]}
+    if format_type != "mp3":
+        select_opts["merge_output_format"] = format_type
+
+    # Pick the formats (and the final file name) the way an inline
+    # download would, without downloading anything.
+    with ydl_pool.lease(select_opts) as ydl:
+        if info is None:
+            if phase_callback:
+                phase_callback("extract")
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        if info.get("_type") in ("playlist", "multi_video"):
+            selected = None
+        else:
+            selected = ydl.process_ie_result(dict(info), download=False)
+            final = ydl.prepare_filename(selected)
+
+    if selected is None:
+        files = download_video(
+            url, output_path, format_type, progress_callback,
+            info=info, throttle=throttle, phase_callback=phase_callback, quiet=quiet,
+        )
+        return files, None
+
+    formats = selected.get("requested_formats") or [selected]
+
+    # Each stream to its own file, named like yt-dlp's unmerged formats.
+    stream_opts = {
+        **_base_opts(output_path, quiet),
+        "outtmpl": f"{output_path}/%(title)s.f%(format_id)s.%(ext)s",
+        "format": ",".join(f["format_id"] for f in formats),
+        **_throttle_opts(throttle),
+    }
+    hook = _progress_hook(progress_callback, throttle=throttle, phase_callback=phase_callback)
+
+    with ydl_pool.lease(stream_opts, progress_hooks=[hook]) as ydl:
+        result = _download_from_info(ydl, info, url)
+
+    inputs = [f["path"] for f in downloaded_files(result)]
+    output = f"{os.path.splitext(final)[0]}.{format_type}"
+
+    if format_type == "mp3":
+        kind = "audio"
+    elif len(inputs) > 1:
+        kind = "merge"
+    elif format_type == "mkv" and not inputs[0].endswith(".mkv"):
+        kind = "remux"
+    else:
+        # A single stream that is usable as-is; just give it its final name.
+        kind = None
+        output = os.path.splitext(final)[0] + os.path.splitext(inputs[0])[1]
+        os.replace(inputs[0], output)
+
+    files = [_file_record(selected, output)]
+    if kind is None:
+        return files, None
+
+    task = {
+        "kind": kind,
+        "inputs": inputs,
+        "output": output,
+        "duration": selected.get("duration"),
+    }
+    return files, task
+
+
+def _download_from_info(ydl, info, url):
+    """Run format selection and download on a resolved info dict."""
+    info = dict(info)
+    info.setdefault("__files_to_move", {})
+
+    from yt_dlp.utils import DownloadError
+
+    try:
+        return ydl.process_ie_result(info, download=True)
+    except DownloadError as e:
+        # Usually expired stream URLs; re-extract from scratch.
+        logger.warning(f"Pre-resolved download failed ({e}); re-extracting {url}")
+        return ydl.extract_info(info.get("webpage_url") or url, download=True)
+
+
+def downloaded_files(info):
+    """Flatten a processed info dict into one record per final output file."""
+    if not info:
+        return []
+
+    if info.get("_type") == "playlist":
+        files = []
+        for entry in info.get("entries") or []:
+            files.extend(downloaded_files(entry))
+        return files
+
+    return [
+        _file_record(info, download["filepath"])
+        for download in info.get("requested_downloads") or []
+        if download.get("filepath")
+    ]
+
+
+def _file_record(info, path):
+    return {
+        "path": path,
+        "title": info.get("title"),
+        "url": info.get("webpage_url"),
+        "video_id": info.get("id"),
+        "extractor": info.get("extractor_key"),
+        "duration": info.get("duration"),
+        "format": os.path.splitext(path)[1].lstrip(".").lower(),
+    }
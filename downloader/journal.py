@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Fields needed to rebuild a job; resolved info is re-fetched on restore.
+JOB_FIELDS = (
+    "id", "url", "output_path", "format_type", "title", "playlist", "playlist_index",
+    "rate_limit", "priority", "paused",
+)
+
+# Rewrite the journal once this many finished jobs have piled up in it.
+COMPACT_AFTER = 500
+
+
+class QueueJournal:
+    """Append-only log of queue state transitions, one JSON object per line.
+
+    Records are ``{"op": "add", "job": {...}}``, ``{"op": "set", "id",
+    "fields": {...}}`` and ``{"op": "done", "id"}``. Replaying the file yields the
+    jobs that were added but never finished, in their original order. Each
+    record is flushed as it is written, so a crash loses nothing the OS
+    already has.
+
+    The journal replays its own records as it writes them, so it always
+    knows the unfinished jobs and can compact itself from that under the
+    same lock that orders the appends.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = None
+        self._done_since_compact = 0
+        # Unfinished jobs (JOB_FIELDS dicts) by id, in the order added.
+        self._live = {}
+
+    def load(self):
+        """Replay the journal, compact it, and return the unfinished jobs."""
+        with self._lock:
+            self._live = {}
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # Torn last line from a crash mid-write.
+                            continue
+                        self._apply(record)
+
+            self._rewrite()
+            return [dict(job) for job in self._live.values()]
+
+    def add(self, job):
+        self._append({"op": "add", "job": {k: job.get(k) for k in JOB_FIELDS}})
+
+    def update(self, job, fields):
+        """Record the current value of ``fields`` (names in JOB_FIELDS)."""
+        self._append({"op": "set", "id": job["id"], "fields": {k: job.get(k) for k in fields}})
+
+    def done(self, job):
+        """Record that ``job`` is finished (or failed/cancelled/replaced)."""
+        self._append({"op": "done", "id": job["id"]})
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _apply(self, record):
+        # Caller holds self._lock.
+        op = record.get("op")
+        if op == "add":
+            self._live[record["job"]["id"]] = dict(record["job"])
+        elif op == "set" and record["id"] in self._live:
+            self._live[record["id"]].update(record["fields"])
+        elif op == "done":
+            self._live.pop(record["id"], None)
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._apply(record)
+            try:
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+            except OSError as e:
+                logger.error(f"Could not write queue journal: {e}")
+
+            if record["op"] == "done":
+                self._done_since_compact += 1
+                if self._done_since_compact >= COMPACT_AFTER:
+                    self._rewrite()
+
+    def _rewrite(self):
+        # Caller holds self._lock.
+        if self._file:
+            self._file.close()
+            self._file = None
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for job in self._live.values():
+                    record = {"op": "add", "job": job}
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Could not compact queue journal: {e}")
+
+        self._done_since_compact = 0
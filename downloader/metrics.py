@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the phase duration histogram buckets.
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+# Upper bounds (bytes/s) of the transfer speed histogram buckets.
+SPEED_BUCKETS = tuple(2 ** n * 1024 for n in range(4, 17, 2))  # 16 KiB/s .. 64 MiB/s
+
+# Completed job records kept for the JSON snapshot.
+RECENT_JOBS = 200
+
+# Minimum seconds between automatic writes of the export files.
+WRITE_INTERVAL = 5.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self):
+        return {
+            "buckets": {str(bound): total for bound, total in self.cumulative()},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class _JobTimer:
+    def __init__(self, now):
+        self.created = now
+        self.phase = None
+        self.phase_started = now
+        self.phases = {}
+        # Latest downloaded_bytes per file; a retry that restarts or
+        # resumes a file overwrites its count instead of adding to it.
+        self.file_bytes = {}
+        self.peak_speed = 0.0
+
+    def enter(self, phase, now):
+        if self.phase is not None:
+            self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self.phase_started
+        self.phase = phase
+        self.phase_started = now
+
+
+class MetricsRegistry:
+    """Per-job phase timings and throughput, aggregated into histograms.
+
+    The queue reports each job's phase changes (queued, extract,
+    transfer, merge, postprocess, paused) and its progress states; when
+    the job is over, its durations, bytes, average/peak speed and retries
+    go into the aggregates and a bounded list of recent jobs. snapshot()
+    and prometheus_text() export them; with ``export_dir`` set, both are
+    written there as metrics.json and metrics.prom (at most every
+    WRITE_INTERVAL seconds, and on write()).
+    """
+
+    def __init__(self, export_dir=None):
+        self.export_dir = Path(export_dir) if export_dir else None
+
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._recent = deque(maxlen=RECENT_JOBS)
+        self._phase_hist = {}
+        self._speed_hist = Histogram(SPEED_BUCKETS)
+        self._outcomes = {}
+        self._retries = 0
+        self._bytes = 0
+        self._last_write = 0.0
+
+    # ---------------- Recording ----------------
+    def start(self, job_id, phase="queued"):
+        """Start timing a new job in ``phase``."""
+        now = time.monotonic()
+        with self._lock:
+            timer = self._jobs[job_id] = _JobTimer(now)
+            timer.enter(phase, now)
+
+    def enter(self, job_id, phase):
+        """Mark the start of ``phase`` for a job (ends the previous one)."""
+        now = time.monotonic()
+        with self._lock:
+            timer = self._jobs.get(job_id)
+            # Unknown: already done (e.g. cancelled while resolving).
+            if timer is not None and timer.phase != phase:
+                timer.enter(phase, now)
+
+    def observe(self, job_id, state):
+        """Take bytes and speed from a download progress state."""
+        with self._lock:
+            timer = self._jobs.get(job_id)
+            if timer is None:
+                return
+            downloaded = state.get("downloaded_bytes")
+            if downloaded is not None:
+                timer.file_bytes[state.get("filename")] = downloaded
+            speed = state.get("speed")
+            if speed and speed > timer.peak_speed:
+                timer.peak_speed = speed
+
+    def discard(self, job_id):
+        """Forget a job without counting it (e.g. a playlist that was expanded)."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def job_done(self, job, outcome):
+        now = time.monotonic()
+        with self._lock:
+            timer = self._jobs.pop(job["id"], None)
+            if timer is None:
+                return
+            timer.enter(None, now)
+
+            total_bytes = sum(timer.file_bytes.values())
+            transfer = timer.phases.get("transfer", 0.0)
+            avg_speed = total_bytes / transfer if transfer and total_bytes else None
+
+            for phase, seconds in timer.phases.items():
+                hist = self._phase_hist.get(phase)
+                if hist is None:
+                    hist = self._phase_hist[phase] = Histogram(DURATION_BUCKETS)
+                hist.observe(seconds)
+            if avg_speed:
+                self._speed_hist.observe(avg_speed)
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            self._retries += job.get("attempts", 0)
+            self._bytes += total_bytes
+
+            self._recent.append({
+                "id": job["id"],
+                "title": job.get("title"),
+                "url": job.get("url"),
+                "outcome": outcome,
+                "seconds": round(now - timer.created, 3),
+                "phases": {k: round(v, 3) for k, v in timer.phases.items()},
+                "bytes": total_bytes,
+                "avg_speed": avg_speed,
+                "peak_speed": timer.peak_speed or None,
+                "retries": job.get("attempts", 0),
+            })
+
+            due = self.export_dir is not None and now - self._last_write >= WRITE_INTERVAL
+
+        if due:
+            self.write()
+
+    # ---------------- Export ----------------
+    def snapshot(self):
+        with self._lock:
+            return {
+                "generated_at": time.time(),
+                "jobs": dict(self._outcomes),
+                "retries": self._retries,
+                "bytes": self._bytes,
+                "in_flight": len(self._jobs),
+                "phase_seconds": {p: h.to_dict() for p, h in self._phase_hist.items()},
+                "speed_bytes_per_second": self._speed_hist.to_dict(),
+                "recent": list(self._recent),
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP yui_jobs_total Jobs that ended, by outcome.",
+                "# TYPE yui_jobs_total counter",
+            ]
+            for outcome, count in sorted(self._outcomes.items()):
+                lines.append(f'yui_jobs_total{{outcome="{outcome}"}} {count}')
+
+            lines += [
+                "# HELP yui_job_retries_total Download retries over all jobs.",
+                "# TYPE yui_job_retries_total counter",
+                f"yui_job_retries_total {self._retries}",
+                "# HELP yui_downloaded_bytes_total Bytes transferred by jobs that ended.",
+                "# TYPE yui_downloaded_bytes_total counter",
+                f"yui_downloaded_bytes_total {self._bytes}",
+                "# HELP yui_jobs_in_flight Jobs queued, running or post-processing.",
+                "# TYPE yui_jobs_in_flight gauge",
+                f"yui_jobs_in_flight {len(self._jobs)}",
+                "# HELP yui_job_phase_seconds Time a job spent in each phase.",
+                "# TYPE yui_job_phase_seconds histogram",
+            ]
+            for phase, hist in sorted(self._phase_hist.items()):
+                lines += _histogram_lines("yui_job_phase_seconds", hist, f'phase="{phase}",')
+
+            lines += [
+                "# HELP yui_job_speed_bytes_per_second Average transfer speed per job.",
+                "# TYPE yui_job_speed_bytes_per_second histogram",
+            ]
+            lines += _histogram_lines("yui_job_speed_bytes_per_second", self._speed_hist, "")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Write metrics.json and metrics.prom to ``export_dir``."""
+        if self.export_dir is None:
+            return
+
+        with self._lock:
+            self._last_write = time.monotonic()
+
+        try:
+            self.export_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(self.export_dir / "metrics.json", json.dumps(self.snapshot(), indent=2))
+            _write_atomic(self.export_dir / "metrics.prom", self.prometheus_text())
+        except OSError as e:
+            logger.error(f"Could not write metrics: {e}")
+
+
+def _histogram_lines(name, hist, labels):
+    lines = [f'{name}_bucket{{{labels}le="{bound}"}} {total}' for bound, total in hist.cumulative()]
+    labels = labels.rstrip(",")
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {hist.sum}")
+    lines.append(f"{name}_count{suffix} {hist.count}")
+    return lines
+
+
+def _write_atomic(path, text):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,199 @@
+import logging
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POSTPROCESS_WORKERS = 2
+
+# FFmpeg output options per task kind; inputs come first, the output last.
+FFMPEG_ARGS = {
+    # Video stream + audio stream into one container, no re-encode.
+    "merge": ["-map", "0:v:0", "-map", "1:a:0", "-c", "copy"],
+    # Single stream into another container, no re-encode.
+    "remux": ["-c", "copy"],
+    "audio": ["-vn", "-c:a", "libmp3lame", "-b:a", "192k"],
+}
+
+# Containers that get the index up front, as yt-dlp's own merger does.
+FASTSTART_EXTS = (".mp4", ".m4a", ".mov")
+
+# How often a running FFmpeg checks whether the pool is closing (seconds).
+STOP_POLL_INTERVAL = 0.5
+
+# Set in each pool process by _init_worker.
+_progress_queue = None
+_stop = None
+
+
+def _init_worker(progress_queue, stop):
+    global _progress_queue, _stop
+    _progress_queue = progress_queue
+    _stop = stop
+
+
+def _kill_on_stop(proc):
+    # Runs on a thread in the pool process for as long as FFmpeg does.
+    while proc.poll() is None:
+        if _stop.wait(STOP_POLL_INTERVAL):
+            proc.kill()
+            return
+
+
+def run_task(task):
+    """Run one FFmpeg task in a pool process; returns the output path.
+
+    ``task`` is a dict with id, kind (a FFMPEG_ARGS key), inputs, output
+    and optionally duration (seconds, used for progress). The inputs are
+    deleted once the output is in place.
+    """
+    if _stop is not None and _stop.is_set():
+        # Already handed to this process when the pool closed.
+        raise RuntimeError("Post-processing pool closed")
+
+    output = task["output"]
+    root, ext = os.path.splitext(output)
+    # Written under a temporary name so a half-written file never looks done.
+    temp = f"{root}.temp{ext}"
+
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-nostdin", "-loglevel", "error",
+           "-progress", "pipe:1", "-nostats"]
+    for path in task["inputs"]:
+        cmd += ["-i", path]
+    cmd += FFMPEG_ARGS[task["kind"]]
+    if task["kind"] != "audio" and ext.lower() in FASTSTART_EXTS:
+        cmd += ["-movflags", "+faststart"]
+    cmd.append(temp)
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    if _stop is not None:
+        threading.Thread(target=_kill_on_stop, args=(proc,), daemon=True).start()
+
+    duration = task.get("duration")
+    for line in proc.stdout:
+        # -progress prints key=value lines; out_time_us is the position.
+        if duration and line.startswith("out_time_us=") and _progress_queue is not None:
+            try:
+                position = int(line.split("=", 1)[1]) / 1_000_000
+            except ValueError:
+                continue
+            _progress_queue.put((task["id"], min(100.0, position / duration * 100)))
+
+    error = proc.stderr.read()
+    if proc.wait():
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise RuntimeError(f"FFmpeg {task['kind']} failed: {error.strip()[-500:]}")
+
+    os.replace(temp, output)
+    for path in task["inputs"]:
+        if os.path.abspath(path) != os.path.abspath(output):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return output
+
+
+class PostProcessingPool:
+    """Bounded process pool for the FFmpeg stage of a download.
+
+    Download workers hand their finished stream files over with submit()
+    and move on to the next network job. Each pool process drives one
+    FFmpeg at a time, so ``max_workers`` bounds how many run at once.
+    Progress from the pool processes comes back over a queue and is
+    delivered to the ``on_progress`` callback given to submit(), from a
+    listener thread. Processes are started on first use.
+
+    close() kills the FFmpeg each process is running and fails whatever
+    they had queued, so the processes exit at once instead of holding up
+    interpreter exit until every merge is done.
+    """
+
+    def __init__(self, max_workers=DEFAULT_POSTPROCESS_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._progress = None
+        self._stop = None
+        self._callbacks = {}
+
+    def _ensure_started(self):
+        # Caller holds self._lock.
+        if self._executor is not None:
+            return
+
+        # Spawn rather than fork: the parent runs Qt and plenty of threads.
+        context = multiprocessing.get_context("spawn")
+        self._progress = context.Queue()
+        self._stop = context.Event()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._progress, self._stop),
+        )
+        threading.Thread(
+            target=self._listen, args=(self._progress,), name="postprocess-progress", daemon=True
+        ).start()
+
+    def submit(self, task, on_progress=None):
+        """Queue ``task`` (see run_task); returns a Future of the output path."""
+        with self._lock:
+            self._ensure_started()
+            if on_progress:
+                self._callbacks[task["id"]] = on_progress
+            try:
+                future = self._executor.submit(run_task, task)
+            except BrokenProcessPool:
+                # A pool process died (killed, out of memory); start afresh.
+                logger.warning("Post-processing pool broke; restarting it")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._progress.put(None)
+                self._executor = None
+                self._ensure_started()
+                future = self._executor.submit(run_task, task)
+
+        future.add_done_callback(lambda _: self._callbacks.pop(task["id"], None))
+        return future
+
+    def _listen(self, progress):
+        while True:
+            item = progress.get()
+            if item is None:
+                return
+            task_id, percent = item
+            callback = self._callbacks.get(task_id)
+            if callback:
+                try:
+                    callback(percent)
+                except Exception as e:
+                    logger.debug(f"Post-processing progress callback failed: {e}")
+
+    def close(self):
+        """Drop queued tasks, kill running FFmpegs and stop the pool.
+
+        Their partial outputs are removed and their inputs kept.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            progress, self._progress = self._progress, None
+            stop, self._stop = self._stop, None
+
+        if executor is not None:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            progress.put(None)
@@ -0,0 +1,166 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Environment variable that turns profiling on without touching config.json;
+# its value, if not just "1", is used as the output folder.
+PROFILE_ENV = "YUI_PROFILE"
+
+# Rows in the logged hot-function and allocation tables.
+TOP_N = 15
+
+# Frames kept per allocation trace; more costs memory while tracing.
+TRACEMALLOC_FRAMES = 5
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def profiler_from_settings(settings, default_dir):
+    """A JobProfiler if the ``profiling`` setting or YUI_PROFILE asks for one."""
+    env = os.environ.get(PROFILE_ENV, "").strip()
+    if env and env != "0":
+        return JobProfiler(default_dir if env == "1" else env)
+    if settings.get("profiling"):
+        return JobProfiler(settings.get("profile_dir") or default_dir)
+    return None
+
+
+class _HookTimer:
+    """Call count and time spent in one job's progress callback."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    def wrap(self, callback):
+        def timed(state):
+            start = time.perf_counter()
+            try:
+                return callback(state)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.calls += 1
+                self.total += elapsed
+                if elapsed > self.slowest:
+                    self.slowest = elapsed
+        return timed
+
+
+class JobProfiler:
+    """cProfile and tracemalloc around the per-job hot paths.
+
+    The queue runs each job's extraction and download through run(); each
+    call is profiled on its own and written to ``output_dir`` as
+    ``<job id>-<section>.prof`` (open with ``python -m pstats`` or
+    snakeviz), and a summary of the hottest functions and the largest
+    allocations is logged. wrap_hook() times a job's progress callback;
+    the totals are logged with the download summary.
+
+    tracemalloc is process-wide, so with several jobs at once the
+    allocation table also counts other threads. With no JobProfiler the
+    queue calls straight through and pays nothing.
+    """
+
+    def __init__(self, output_dir, top_n=TOP_N):
+        self.output_dir = Path(output_dir)
+        self.top_n = top_n
+
+        self._lock = threading.Lock()
+        self._tracing = 0
+        self._started_tracemalloc = False
+        self._hooks = {}
+
+    def wrap_hook(self, job_id, callback):
+        timer = self._hooks[job_id] = _HookTimer()
+        return timer.wrap(callback)
+
+    def run(self, job_id, section, func, *args, **kwargs):
+        """Call ``func`` under the profilers and report on it."""
+        self._start_tracing()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler owns this thread (e.g. a debugger).
+            profile = None
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if profile:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            self._stop_tracing()
+            self._report(job_id, section, elapsed, profile, before, after, peak)
+
+    def _start_tracing(self):
+        with self._lock:
+            if not self._tracing and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            self._tracing += 1
+
+    def _stop_tracing(self):
+        with self._lock:
+            self._tracing -= 1
+            # Left running if it was on before (PYTHONTRACEMALLOC).
+            if not self._tracing and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def _report(self, job_id, section, elapsed, profile, before, after, peak):
+        name = _UNSAFE.sub("_", f"{job_id}-{section}")
+        lines = [f"Profile of {section} for job {job_id}: {elapsed:.3f}s, "
+                 f"traced memory peak {peak / 1024 ** 2:.1f} MiB"]
+
+        if profile:
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                path = self.output_dir / f"{name}.prof"
+                profile.dump_stats(path)
+                lines.append(f"  written to {path}")
+            except OSError as e:
+                logger.error(f"Could not write profile: {e}")
+
+            out = io.StringIO()
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+            # Skip pstats' preamble; keep the table.
+            table = out.getvalue().split("\n\n", 2)[-1].rstrip()
+            lines.append(f"  top {self.top_n} functions by cumulative time:")
+            lines += ["    " + row for row in table.splitlines() if row.strip()]
+
+        # Leave out the profilers' own bookkeeping (also from other jobs' reports).
+        filters = [
+            tracemalloc.Filter(False, module.__file__)
+            for module in (tracemalloc, cProfile, pstats)
+        ] + [tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        lines.append(f"  top {self.top_n} allocation sites:")
+        for stat in diff[:self.top_n]:
+            lines.append(f"    {stat}")
+
+        timer = self._hooks.pop(job_id, None) if section == "download" else None
+        if timer and timer.calls:
+            lines.append(
+                f"  progress callback: {timer.calls} calls, "
+                f"{timer.total * 1000:.1f} ms total, "
+                f"{timer.total / timer.calls * 1000:.3f} ms mean, "
+                f"{timer.slowest * 1000:.1f} ms slowest"
+            )
+
+        logger.info("\n".join(lines))
@@ -0,0 +1,51 @@
+import threading
+import time
+
+DEFAULT_FLUSH_INTERVAL = 0.1  # 10 Hz
+
+
+class ProgressAggregator:
+    """Coalesces per-job progress updates and flushes them in batches.
+
+    Download threads call update() as often as yt-dlp reports; only the
+    latest state per job is kept, and ``flush_callback`` receives a
+    ``{key: state}`` dict at most once per ``interval`` seconds.
+    """
+
+    def __init__(self, flush_callback, interval=DEFAULT_FLUSH_INTERVAL):
+        self.flush_callback = flush_callback
+        self.interval = interval
+
+        self._latest = {}
+        self._lock = threading.Lock()
+        # Held across swap + callback so batches are delivered in order.
+        self._flush_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._thread = None
+
+    def update(self, key, state):
+        with self._lock:
+            self._latest[key] = state
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="progress-flush", daemon=True
+                )
+                self._thread.start()
+        self._dirty.set()
+
+    def flush(self):
+        """Deliver pending updates now (e.g. right before a job finishes)."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._latest = self._latest, {}
+                self._dirty.clear()
+
+            if batch:
+                self.flush_callback(batch)
+
+    def _run(self):
+        while True:
+            # Sleeps without waking while nothing is downloading.
+            self._dirty.wait()
+            time.sleep(self.interval)
+            self.flush()
@@ -1,59 +1,736 @@
+import itertools
 import threading
-from queue import Queue
-from downloader.download import download_video
-from downloader.download import get_video_info
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from urllib.parse import urlparse
+from downloader.download import download_streams, download_video
+from downloader.download import get_video_info, url_archive_key
+from downloader.archive import archive_key
+from downloader.progress import ProgressAggregator
+
+DEFAULT_MAX_WORKERS = 3
+DEFAULT_RESOLVER_WORKERS = 4
+DEFAULT_MAX_RETRIES = 2
+
+# Higher runs first; jobs of equal priority run in the order they were added.
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+
+def _host_of(url):
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+class JobCancelled(Exception):
+    """Raised from the progress hook to abort a running download."""
+
+
+class JobPaused(Exception):
+    """Raised from the progress hook to stop a running download for later."""
+
+
+def _new_job(url, output_path, format_type, title=None, playlist=None, playlist_index=None,
+             job_id=None, rate_limit=None, priority=PRIORITY_NORMAL, paused=False):
+    return {
+        # Stable across restarts; signals, the UI and the journal all
+        # refer to jobs by it (titles are neither unique nor fixed).
+        "id": job_id or uuid.uuid4().hex,
+        "url": url,
+        "output_path": output_path,
+        "format_type": format_type,
+        # Placeholder until metadata is resolved.
+        "title": title or url,
+        "host": _host_of(url),
+        "info": None,
+        "resolving": False,
+        "resolved": False,
+        "attempts": 0,
+        "cancelled": False,
+        "paused": paused,
+        "priority": priority,
+        # Queue position within the priority; set when (re)queued.
+        "seq": None,
+        # queued -> running -> (processing); back to queued on retry/pause.
+        "state": "queued",
+        # Kept so per-entry history still records the playlist.
+        "playlist": playlist,
+        "playlist_index": playlist_index,
+        # Optional per-job bandwidth cap (bytes/s or "2M"), on top of the
+        # global budget.
+        "rate_limit": rate_limit,
+    }
+
+
+def _order(job):
+    return (-job["priority"], job["seq"])
+
 
 class DownloadQueueManager:
-    def __init__(self, signals):
-        self.queue = Queue()
+    """Registry of download jobs keyed by job id, with a priority scheduler.
+
+    Jobs wait in ``pending`` ordered by priority, then by arrival; both
+    metadata resolution and downloads pick the first eligible job in that
+    order, so a high-priority job added behind a long backlog is resolved
+    and started next. Queued and running jobs can be reprioritized,
+    paused, resumed and cancelled by id.
+    """
+
+    def __init__(
+        self,
+        signals,
+        max_workers=DEFAULT_MAX_WORKERS,
+        per_host_limit=None,
+        resolver_workers=DEFAULT_RESOLVER_WORKERS,
+        max_retries=DEFAULT_MAX_RETRIES,
+        journal=None,
+        bandwidth=None,
+        postprocessor=None,
+        archive=None,
+        metrics=None,
+        profiler=None,
+        quiet=False,
+    ):
         self.signals = signals
-        self.is_downloading = False
+        self.max_workers = max(1, int(max_workers))
+        # None (or 0) means no cap beyond max_workers.
+        self.per_host_limit = per_host_limit or None
+        self.max_retries = max_retries
+        # Optional QueueJournal; lets restore() bring back unfinished jobs.
+        self.journal = journal
+        # Optional BandwidthScheduler shared by all running downloads.
+        self.bandwidth = bandwidth
+        # Optional PostProcessingPool; without one FFmpeg runs inside the
+        # download call and holds its worker slot.
+        self.postprocessor = postprocessor
+        # Optional DownloadArchive; videos in it are skipped, not re-downloaded.
+        self.archive = archive
+        # Optional MetricsRegistry fed with per-job phase timings.
+        self.metrics = metrics
+        # Optional JobProfiler run around extraction and download calls.
+        self.profiler = profiler
+        # Keep yt-dlp's console output off stdout (headless JSON mode).
+        self.quiet = quiet
+
+        self.lock = threading.Lock()
+        # Every live job (queued, running or processing), by id.
+        self.jobs = {}
+        # Queued jobs, kept sorted by _order.
+        self.pending = []
+        self._seq = itertools.count()
+        self.active = 0
+        self.active_per_host = {}
+        self.running = []
+        # Downloaded and handed to the post-processing pool.
+        self.processing = []
+        self.idle = threading.Event()
+        self.idle.set()
+        # Set by close(); jobs cut short from then on stay in the journal.
+        self.closing = False
+
+        # yt-dlp reports every chunk; the UI gets one batched signal per tick.
+        self.progress = ProgressAggregator(self.signals.progress_batch.emit)
+
+        # Metadata lookups run here so add() never blocks on yt-dlp.
+        self.resolver = ThreadPoolExecutor(
+            max_workers=max(1, int(resolver_workers)),
+            thread_name_prefix="resolver",
+        )
+
+    @property
+    def is_downloading(self):
+        return self.active > 0
+
+    def wait(self, timeout=None):
+        """Block until nothing is pending, resolving or downloading.
+
+        Paused jobs don't count; they wait for resume().
+        """
+        return self.idle.wait(timeout)
+
+    def close(self):
+        """Stop post-processing for exit.
+
+        Jobs whose FFmpeg step had not finished are left in the journal
+        (with their stream files on disk), so restore() redoes them.
+        """
+        self.closing = True
+        if self.postprocessor:
+            self.postprocessor.close()
+
+    # ---------------- Job control ----------------
+    def add(self, url, output_path, format_type, rate_limit=None, priority=PRIORITY_NORMAL):
+        """QUEUE A PLACEHOLDER JOB AND RESOLVE ITS METADATA IN THE BACKGROUND.
+
+        Returns the new job's id.
+        """
+        job = _new_job(url, output_path, format_type, rate_limit=rate_limit, priority=priority)
+        self._enqueue([job])
+        return job["id"]
+
+    def list_jobs(self):
+        """Live jobs in run order: running, processing, then queued."""
+        with self.lock:
+            jobs = self.running + self.processing + self.pending
+            return [
+                {k: job[k] for k in ("id", "title", "url", "state", "priority", "paused",
+                                     "playlist", "playlist_index")}
+                for job in jobs
+            ]
+
+    def cancel(self, job_id):
+        """Cancel a queued, running or processing job.
+
+        False if there is no such job, or its FFmpeg step is already running.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+
+            state = job["state"]
+            if state != "processing":
+                job["cancelled"] = True
+                if state == "queued":
+                    self.pending.remove(job)
+
+        if state == "running":
+            # The worker notices on its next progress report.
+            if self.bandwidth:
+                self.bandwidth.wake(job_id)
+            return True
+        if state == "processing":
+            # Only works while the task is still queued; a running FFmpeg
+            # is left to finish. Outside the lock: a successful cancel()
+            # runs _processed, which retires the job, right away.
+            if not job["postprocess"].cancel():
+                return False
+            job["cancelled"] = True
+            return True
+
+        self._retire(job, "cancelled")
+        self.signals.queue_update.emit("Cancelled", job_id, job["title"])
+        self._start_next()
+        return True
+
+    def pause(self, job_id):
+        """Hold a queued job back, or stop a running one and requeue it paused.
+
+        A stopped download keeps its .part file and continues from it on
+        resume(). Jobs already in post-processing can't be paused.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["state"] == "processing":
+                return False
+            if job["paused"]:
+                return True
+            job["paused"] = True
+            queued = job["state"] == "queued"
+
+        if self.journal:
+            self.journal.update(job, ("paused",))
+
+        if queued:
+            self._phase(job, "paused")
+            self.signals.queue_update.emit("Paused", job_id, job["title"])
+            self._start_next()
+        elif self.bandwidth:
+            # Don't let a throttle pause delay the stop.
+            self.bandwidth.wake(job_id)
+        return True
+
+    def resume(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or not job["paused"]:
+                return False
+            job["paused"] = False
+            queued = job["state"] == "queued"
+            self.idle.clear()
+
+        if self.journal:
+            self.journal.update(job, ("paused",))
+
+        if queued:
+            self._phase(job, "queued")
+            self.signals.queue_update.emit("Queued", job_id, job["title"])
+        self._start_next()
+        return True
+
+    def set_priority(self, job_id, priority):
+        """Move a job within the queue; running jobs keep running."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            job["priority"] = priority
+            if job["state"] == "queued":
+                self.pending.remove(job)
+                self._push(job)
+
+        if self.journal:
+            self.journal.update(job, ("priority",))
+
+        self._start_next()
+        return True
+
+    def restore(self):
+        """Re-queue the unfinished jobs recorded in the journal.
+
+        Interrupted downloads pick up from their .part files, since the
+        output template (and so the file name) is the same as before.
+        """
+        if not self.journal:
+            return 0
+
+        jobs = [
+            _new_job(
+                j["url"], j["output_path"], j["format_type"],
+                title=j.get("title"),
+                playlist=j.get("playlist"),
+                playlist_index=j.get("playlist_index"),
+                job_id=j["id"],
+                rate_limit=j.get("rate_limit"),
+                priority=j.get("priority") or PRIORITY_NORMAL,
+                paused=bool(j.get("paused")),
+            )
+            for j in self.journal.load()
+        ]
+        if jobs:
+            # Already in the (just compacted) journal.
+            self._enqueue(jobs, record=False)
+        return len(jobs)
+
+    # ---------------- Bookkeeping ----------------
+    def _push(self, job):
+        # Caller holds self.lock. Scans from the back: a normal job lands
+        # at the end right away, an urgent one walks past the backlog.
+        job["state"] = "queued"
+        job["seq"] = next(self._seq)
+        key = _order(job)
+        i = len(self.pending)
+        while i and _order(self.pending[i - 1]) > key:
+            i -= 1
+        self.pending.insert(i, job)
+
+    def _retire(self, job, outcome):
+        """Forget a job that is over: finished, failed, cancelled or skipped."""
+        with self.lock:
+            self.jobs.pop(job["id"], None)
+        if self.journal:
+            self.journal.done(job)
+        if self.metrics:
+            self.metrics.job_done(job, outcome)
+
+    def _profiled(self, job, section, func, *args, **kwargs):
+        if self.profiler is None:
+            return func(*args, **kwargs)
+        return self.profiler.run(job["id"], section, func, *args, **kwargs)
+
+    def _phase(self, job, phase):
+        if self.metrics:
+            self.metrics.enter(job["id"], phase)
+
+    def _enqueue(self, jobs, replaces=None, record=True):
+        with self.lock:
+            # Swap in one step so the queue never looks empty in between.
+            if replaces is not None:
+                if replaces["cancelled"]:
+                    return False
+                self.pending.remove(replaces)
+                self.jobs.pop(replaces["id"], None)
+            for job in jobs:
+                self.jobs[job["id"]] = job
+                self._push(job)
+            self.idle.clear()
+
+        if self.journal and record:
+            for job in jobs:
+                self.journal.add(job)
+            if replaces is not None:
+                self.journal.done(replaces)
+
+        if self.metrics:
+            for job in jobs:
+                self.metrics.start(job["id"], "paused" if job["paused"] else "queued")
+            if replaces is not None:
+                # Its children carry on; the playlist itself isn't a download.
+                self.metrics.discard(replaces["id"])
+
+        for job in jobs:
+            status = "Paused" if job["paused"] else "Queued"
+            self.signals.queue_update.emit(status, job["id"], job["title"])
+
+        for job in jobs:
+            self.resolver.submit(self._resolve_next)
+        return True
+
+    # ---------------- Resolution ----------------
+    def _archived(self, job, info=None):
+        if self.archive is None:
+            return False
+        if info:
+            return self.archive.contains(info.get("extractor_key"), info.get("id"))
+        try:
+            return url_archive_key(job["url"]) in self.archive
+        except Exception:
+            return False
+
+    def _skip(self, job):
+        """Drop a queued job whose video is already in the archive."""
+        with self.lock:
+            # cancel() got there first and has retired it already.
+            if job["cancelled"]:
+                return
+            if job in self.pending:
+                self.pending.remove(job)
+        self._retire(job, "skipped")
+        self.signals.queue_update.emit("Skipped", job["id"], job["title"])
+        self._start_next()
 
-    def add(self, url, output_path, format_type):
-        """ADD ITEM TO QUEUE AND START IF IDLE."""
+    def _resolve_next(self):
+        # One call per queued job, but it takes whichever unresolved job
+        # is first in priority order now, not the one it was queued for.
+        with self.lock:
+            job = next((j for j in self.pending if not j["resolving"] and not j["resolved"]), None)
+            if job is None:
+                return
+            job["resolving"] = True
+
+        self._resolve(job)
+
+    def _resolve(self, job):
+        # Known from the URL alone: skip before any network request.
+        if self._archived(job):
+            self._skip(job)
+            return
+
+        self._phase(job, "extract")
         try:
-            info = get_video_info(url)
-            title = info.get("title", url)
+            # Flat extraction keeps a playlist cheap: entries come back as
+            # bare URLs and are resolved as their own jobs.
+            info = self._profiled(job, "extract", get_video_info, job["url"], flat_playlist=True)
         except Exception as e:
-            title = url
+            info = None
 
-        self.queue.put((url, output_path, format_type, title))
-        self.signals.queue_update.emit("Queued", title)
+        if job["cancelled"]:
+            return
 
-        if not self.is_downloading:
-            self._start_next()
+        if info and info.get("_type") == "playlist":
+            self._expand_playlist(job, info)
+            return
+
+        if self._archived(job, info):
+            self._skip(job)
+            return
+
+        placeholder = job["title"]
+        title = (info or {}).get("title") or placeholder
+
+        with self.lock:
+            job["info"] = info
+            job["title"] = title
+
+        if title != placeholder:
+            if self.journal:
+                self.journal.update(job, ("title",))
+            # Rename before the job becomes runnable so the UI has the
+            # real title by the time it starts.
+            self.signals.renamed.emit(job["id"], title)
+
+        self._phase(job, "paused" if job["paused"] else "queued")
+        with self.lock:
+            job["resolved"] = True
+
+        self._start_next()
+
+    def _expand_playlist(self, job, info):
+        """Replace a playlist job with one job per entry."""
+        playlist = info.get("title") or job["url"]
+        children = []
+        skipped = 0
+
+        for index, entry in enumerate(info.get("entries") or [], start=1):
+            if not entry:
+                continue
+            entry_url = entry.get("webpage_url") or entry.get("url")
+            if not entry_url:
+                continue
+            if self.archive is not None and archive_key(entry.get("ie_key"), entry.get("id")) in self.archive:
+                skipped += 1
+                continue
+
+            children.append(_new_job(
+                entry_url,
+                job["output_path"],
+                job["format_type"],
+                title=entry.get("title"),
+                playlist=playlist,
+                playlist_index=entry.get("playlist_index") or index,
+                rate_limit=job["rate_limit"],
+                priority=job["priority"],
+                paused=job["paused"],
+            ))
+
+        if not self._enqueue(children, replaces=job):
+            return
+
+        self.signals.queue_update.emit("Removed", job["id"], job["title"])
+        message = f"Playlist: {playlist} ({len(children)} videos"
+        if skipped:
+            message += f", {skipped} already downloaded"
+        self.signals.status.emit(message + ")")
+
+        self._start_next()
+
+    # ---------------- Scheduling ----------------
+    def _take_runnable(self):
+        """Pop the first resolved, unpaused job whose host has a free slot."""
+        for i, job in enumerate(self.pending):
+            if not job["resolved"] or job["paused"]:
+                continue
+            if self.per_host_limit:
+                running = self.active_per_host.get(job["host"], 0)
+                if running >= self.per_host_limit:
+                    continue
+            del self.pending[i]
+            return job
+        return None
+
+    def _is_idle(self):
+        # Caller holds self.lock.
+        return (
+            self.active == 0
+            and not self.processing
+            and all(job["paused"] for job in self.pending)
+        )
 
     def _start_next(self):
-        if self.queue.empty():
-            self.is_downloading = False
+        started = []
+
+        with self.lock:
+            while self.active < self.max_workers:
+                job = self._take_runnable()
+                if job is None:
+                    break
+
+                self.active += 1
+                host = job["host"]
+                self.active_per_host[host] = self.active_per_host.get(host, 0) + 1
+                job["state"] = "running"
+                self.running.append(job)
+                started.append(job)
+
+            idle = not started and self._is_idle()
+
+        if idle:
             self.signals.status.emit("Idle")
+            # Re-check: a job may have been added while "Idle" went out.
+            with self.lock:
+                if self._is_idle():
+                    self.idle.set()
             return
-        
-        self.is_downloading = True
 
-        url, output_path, format_type, title = self.queue.get()
+        for job in started:
+            self.signals.queue_update.emit("Starting", job["id"], job["title"])
 
-        self.signals.queue_update.emit("Starting", title)
+            thread = threading.Thread(
+                target=self._download_worker,
+                args=(job,),
+                daemon=True
+            )
+            thread.start()
 
-        thread = threading.Thread(
-            target=self._download_worker,
-            args=(url, output_path, format_type, title),
-            daemon=True
-        )
-        thread.start()
+    # ---------------- Download ----------------
+    def _download_worker(self, job):
+        job_id = job["id"]
+        title = job["title"]
+        requeue = False
+        handed_off = False
+        outcome = None
+        throttle = self.bandwidth.register(job_id, job["rate_limit"]) if self.bandwidth else None
+
+        def on_progress(state):
+            if job["cancelled"]:
+                raise JobCancelled()
+            if job["paused"]:
+                raise JobPaused()
+            if self.metrics:
+                self.metrics.observe(job_id, state)
+            self.progress.update(job_id, state)
+
+        def on_phase(phase):
+            self._phase(job, phase)
+
+        if self.profiler:
+            on_progress = self.profiler.wrap_hook(job_id, on_progress)
 
-    def _download_worker(self, url, output_path, format_type, title):
         try:
-            download_video(
-                url,
-                output_path,
-                format_type,
-                progress_callback=lambda p:self.signals.progress.emit(title, p),
-            )
+            if job["cancelled"]:
+                raise JobCancelled()
+            if job["paused"]:
+                raise JobPaused()
+
+            # Another job may have fetched the same video meanwhile.
+            if job["info"] and self._archived(job, job["info"]):
+                outcome = "skipped"
+                self.signals.queue_update.emit("Skipped", job_id, title)
+                return
+
+            self._phase(job, "transfer")
+            task = None
+            if self.postprocessor:
+                files, task = self._profiled(
+                    job,
+                    "download",
+                    download_streams,
+                    job["url"],
+                    job["output_path"],
+                    job["format_type"],
+                    progress_callback=on_progress,
+                    info=job["info"],
+                    throttle=throttle,
+                    phase_callback=on_phase,
+                    quiet=self.quiet,
+                )
+            else:
+                files = self._profiled(
+                    job,
+                    "download",
+                    download_video,
+                    job["url"],
+                    job["output_path"],
+                    job["format_type"],
+                    progress_callback=on_progress,
+                    info=job["info"],
+                    throttle=throttle,
+                    phase_callback=on_phase,
+                    quiet=self.quiet,
+                )
+
+            # Deliver the final 100% before the next signal.
+            self.progress.flush()
+
+            if task:
+                self._post_process(job, files, task)
+                handed_off = True
+            else:
+                self._finish(job, files)
+                outcome = "finished"
+        except JobCancelled:
+            self.progress.flush()
+            outcome = "cancelled"
+            self.signals.queue_update.emit("Cancelled", job_id, title)
+
+        except JobPaused:
+            # Back in the queue as paused; the .part file is kept.
+            self.progress.flush()
+            requeue = True
+            self.signals.queue_update.emit("Paused", job_id, title)
 
-            self.signals.finished.emit(title, None, None)
         except Exception as e:
-            self.signals.status.emit(f"Error: {str(e)}")
+            if job["attempts"] < self.max_retries:
+                job["attempts"] += 1
+                # Drop the cached info so the retry re-extracts fresh URLs.
+                job["info"] = None
+                requeue = True
+                self.signals.queue_update.emit("Retrying", job_id, title)
+            else:
+                outcome = "failed"
+                self.signals.queue_update.emit("Failed", job_id, title)
+                self.signals.status.emit(f"Error: {str(e)}")
 
         finally:
-            self._start_next()
\ No newline at end of file
+            if throttle:
+                # Hands this job's share back to the others.
+                self.bandwidth.unregister(job_id)
+
+            with self.lock:
+                self.active -= 1
+                self.running.remove(job)
+                host = job["host"]
+                self.active_per_host[host] -= 1
+                if not self.active_per_host[host]:
+                    del self.active_per_host[host]
+
+                if requeue:
+                    self._push(job)
+
+            # A job only leaves the journal once it is truly over; if the
+            # app dies mid-download it is restored on the next start.
+            if requeue:
+                self._phase(job, "paused" if job["paused"] else "queued")
+            elif not handed_off:
+                self._retire(job, outcome)
+
+            self._start_next()
+
+    def _finish(self, job, files):
+        info = job["info"] or {}
+        # A retry drops job["info"] and the download extracts afresh; the
+        # file records carry the same id then.
+        record = files[0] if files else {}
+        video_id = info.get("id") or record.get("video_id")
+        extractor = info.get("extractor_key") or record.get("extractor")
+        if self.archive is not None:
+            self.archive.add(extractor, video_id, job["url"], job["title"])
+
+        self.signals.finished.emit(job["id"], job["title"], job["playlist"], job["playlist_index"], {
+            "url": job["url"],
+            "video_id": video_id,
+            "extractor": extractor,
+            "format": job["format_type"],
+            "folder": job["output_path"],
+            "files": files,
+        })
+
+    def _post_process(self, job, files, task):
+        """Hand the downloaded streams to the pool; the worker slot is freed."""
+        job_id = job["id"]
+
+        def on_progress(percent):
+            self.progress.update(job_id, {"percent": percent, "phase": "processing"})
+
+        if self.closing:
+            # close() ran meanwhile; left in the journal for restore().
+            return
+
+        self._phase(job, "merge" if task["kind"] == "merge" else "postprocess")
+        job["postprocess"] = self.postprocessor.submit({**task, "id": job_id}, on_progress)
+        with self.lock:
+            job["state"] = "processing"
+            self.processing.append(job)
+        self.signals.queue_update.emit("Processing", job_id, job["title"])
+
+        job["postprocess"].add_done_callback(lambda f: self._processed(job, files, f))
+
+    def _processed(self, job, files, future):
+        outcome = "failed"
+        error = None
+        try:
+            future.result()
+            self.progress.flush()
+            self._finish(job, files)
+            outcome = "finished"
+        except CancelledError:
+            outcome = "cancelled"
+        except Exception as e:
+            error = e
+        finally:
+            with self.lock:
+                self.processing.remove(job)
+
+        if outcome != "finished" and self.closing:
+            # Cut short by close(): stays in the journal for restore().
+            return
+
+        if outcome == "cancelled":
+            self.signals.queue_update.emit("Cancelled", job["id"], job["title"])
+        elif outcome == "failed":
+            self.signals.queue_update.emit("Failed", job["id"], job["title"])
+            self.signals.status.emit(f"Error: {str(error)}")
+        self._retire(job, outcome)
+        self._start_next()
@@ -0,0 +1,38 @@
+import threading
+
+
+class Signal:
+    """Plain-Python stand-in for a Qt Signal: connect() slots, emit() calls them.
+
+    Slots run synchronously on the emitting thread (usually a download
+    worker), so they must be thread-safe.
+    """
+
+    def __init__(self):
+        self._slots = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot):
+        with self._lock:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            slot(*args)
+
+
+class QueueSignals:
+    """The signals DownloadQueueManager emits, for use without Qt."""
+
+    def __init__(self):
+        self.status = Signal()          # message
+        self.queue_update = Signal()    # status, job id, title
+        self.renamed = Signal()         # job id, resolved title
+        self.progress_batch = Signal()  # {job id: progress state}
+        self.finished = Signal()        # job id, title, playlist, index, job details
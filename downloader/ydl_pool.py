@@ -0,0 +1,135 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class YoutubeDLPool:
+    """Reusable YoutubeDL instances keyed by their option set.
+
+    Building a YoutubeDL parses cookies.txt and sets up extractors and the
+    JS runtime, so instances are leased out and returned instead of being
+    rebuilt per call. A lease is exclusive to one thread; every instance
+    shares the first instance's cookie jar (http.cookiejar is locked
+    internally), so cookies are parsed once and updates are seen by all.
+    """
+
+    def __init__(self, max_idle_per_key=4, max_keys=8):
+        self.max_idle_per_key = max_idle_per_key
+        self.max_keys = max_keys
+
+        self._idle = OrderedDict()  # key -> [YoutubeDL, ...]
+        self._lock = threading.Lock()
+        self._cookiejar = None
+
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def _key(opts):
+        return json.dumps(opts, sort_keys=True, default=repr)
+
+    def _create(self, opts):
+        # Imported on first use: yt-dlp and its extractors take a while
+        # to load and aren't needed to show the window.
+        import yt_dlp
+
+        ydl = yt_dlp.YoutubeDL(opts)
+
+        with self._lock:
+            self.created += 1
+            if self._cookiejar is None:
+                self._cookiejar = ydl.cookiejar
+                return ydl
+
+        # cookiejar/_request_director are cached properties; point this
+        # instance at the shared jar before any request is made.
+        ydl.__dict__["cookiejar"] = self._cookiejar
+        director = ydl.__dict__.pop("_request_director", None)
+        if director is not None:
+            director.close()
+        return ydl
+
+    @contextmanager
+    def lease(self, opts, progress_hooks=()):
+        """Yield a YoutubeDL built with ``opts`` (hooks excluded from the key)."""
+        key = self._key(opts)
+
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+            if ydl is not None:
+                self.reused += 1
+
+        if ydl is None:
+            ydl = self._create(opts)
+
+        ydl._progress_hooks = list(progress_hooks)
+        failed = False
+        try:
+            yield ydl
+        except Exception:
+            failed = True
+            raise
+        finally:
+            ydl._progress_hooks = []
+            if failed:
+                # Don't hand a half-failed instance to the next job.
+                self._discard(ydl)
+            else:
+                self._release(key, ydl)
+
+    def _release(self, key, ydl):
+        evicted = []
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+
+            if len(idle) < self.max_idle_per_key:
+                idle.append(ydl)
+            else:
+                evicted.append(ydl)
+
+            while len(self._idle) > self.max_keys:
+                _, old = self._idle.popitem(last=False)
+                evicted.extend(old)
+
+        for old in evicted:
+            self._discard(old)
+
+    def _discard(self, ydl):
+        # Keep the shared jar's cookies; only tear down the connections.
+        try:
+            director = ydl.__dict__.pop("_request_director", None)
+            if director is not None:
+                director.close()
+        except Exception as e:
+            logger.debug(f"Error closing YoutubeDL instance: {e}")
+
+    def close(self):
+        """Close every idle instance and write the shared cookie jar back."""
+        with self._lock:
+            instances = [ydl for idle in self._idle.values() for ydl in idle]
+            self._idle.clear()
+
+        for ydl in instances:
+            self._discard(ydl)
+
+        jar = self._cookiejar
+        if jar is not None and getattr(jar, "filename", None):
+            try:
+                jar.save()
+            except Exception as e:
+                logger.debug(f"Could not save cookies: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "idle": sum(len(idle) for idle in self._idle.values()),
+            }
@@ -1,45 +1,243 @@
 import os
 import sys
 import json
+import logging
+import queue
+import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
 
-HISTORY_FILE = Path("history.json")
+logger = logging.getLogger(__name__)
 
-# 
+#
 def app_dir():
+    # Set by benchmarks so they never touch the real history, queue or archive.
+    if os.environ.get("YUI_APP_DIR"):
+        return os.environ["YUI_APP_DIR"]
     if getattr(sys, "frozen", False):
         return os.path.dirname(sys.executable)
     return os.path.dirname(os.path.abspath(__file__))
 
+HISTORY_DB = Path(app_dir()) / "history.db"
+
+# Legacy store, migrated into HISTORY_DB once.
 HISTORY_FILE = Path(app_dir()) / "history.json"
 
+COLUMNS = (
+    "title",
+    "url",
+    "video_id",
+    "extractor",
+    "format",
+    "folder",
+    "path",
+    "playlist",
+    "playlist_index",
+    "timestamp",
+    "date",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    url TEXT,
+    video_id TEXT,
+    extractor TEXT,
+    format TEXT,
+    folder TEXT,
+    path TEXT,
+    playlist TEXT,
+    playlist_index INTEGER,
+    timestamp TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS history_url ON history (url);
+CREATE INDEX IF NOT EXISTS history_video_id ON history (video_id);
+CREATE INDEX IF NOT EXISTS history_date ON history (date);
+CREATE INDEX IF NOT EXISTS history_format ON history (format);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
 
 # -------------------------------
-# Load history
+# Connection
 # -------------------------------
-def load_history():
-    if HISTORY_FILE.exists():
+def _connect():
+    """Per-thread connection; WAL lets readers run alongside the writer."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(HISTORY_DB)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+
+    _ensure_schema(conn)
+    return conn
+
+
+def _ensure_schema(conn):
+    global _initialized
+    if _initialized:
+        return
+
+    with _init_lock:
+        if _initialized:
+            return
+        conn.executescript(SCHEMA)
+        _migrate_json(conn)
+        _initialized = True
+
+
+def _migrate_json(conn):
+    """One-time import of the old history.json (newest first) into the DB."""
+    if not HISTORY_FILE.exists():
+        return
+
+    try:
         with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+            legacy = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    rows = []
+    for item in reversed(legacy):
+        timestamp = item.get("timestamp") or item.get("time") or ""
+        rows.append(_row({**item, "timestamp": timestamp}))
+
+    with conn:
+        conn.executemany(_INSERT, rows)
+
+    HISTORY_FILE.replace(HISTORY_FILE.with_suffix(".json.migrated"))
+
+
+_INSERT = (
+    f"INSERT INTO history ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+
+def _row(entry):
+    timestamp = entry.get("timestamp") or ""
+    return (
+        entry.get("title"),
+        entry.get("url"),
+        entry.get("video_id"),
+        entry.get("extractor"),
+        entry.get("format"),
+        entry.get("folder"),
+        entry.get("path"),
+        entry.get("playlist"),
+        entry.get("playlist_index"),
+        timestamp,
+        timestamp[:10],
+    )
+
+
+# -------------------------------
+# Background writer
+# -------------------------------
+_writes = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _writer_loop():
+    while True:
+        entries = [_writes.get()]
+        # Drain whatever else is waiting into the same transaction.
+        while True:
+            try:
+                entries.append(_writes.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            _write_batch(entries)
+        except Exception as e:
+            # Keep the writer alive; flush_history() must never hang.
+            logger.error(f"Could not write {len(entries)} history entries: {e}")
+        finally:
+            for _ in entries:
+                _writes.task_done()
+
+
+def _write_batch(entries):
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(_INSERT, [_row(e) for e in entries])
+    except sqlite3.Error:
+        if len(entries) == 1:
+            raise
+        # One bad row shouldn't cost the rest of the batch.
+        for entry in entries:
+            try:
+                with conn:
+                    conn.execute(_INSERT, _row(entry))
+            except Exception as e:
+                logger.error(f"Could not write history entry {entry.get('url')}: {e}")
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_writer_loop, name="history-writer", daemon=True)
+            _writer.start()
+
+
+def flush_history():
+    """Block until every queued entry has been written."""
+    _ensure_writer()
+    _writes.join()
 
 
 # -------------------------------
-# Save history
+# Load history
 # -------------------------------
-def save_history(history):
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=4, ensure_ascii=False)
+def query_history(offset=0, limit=None, url=None, video_id=None, date=None, fmt=None):
+    """Return history entries newest first, optionally filtered by indexed columns."""
+    clauses = []
+    params = []
+    for column, value in (("url", url), ("video_id", video_id), ("date", date), ("format", fmt)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+    sql = "SELECT * FROM history"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id DESC LIMIT ? OFFSET ?"
+    params += [-1 if limit is None else limit, offset]
+
+    return [dict(row) for row in _connect().execute(sql, params)]
+
+
+def count_history():
+    return _connect().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+
+def load_history():
+    return query_history()
 
 
 # -------------------------------
 # Add entry
 # -------------------------------
-def add_history_entry(title, url, fmt, folder):
-    history = load_history()
+def add_history_entry(title, url, fmt, folder, **extra):
+    """Queue an entry for the background writer; returns immediately.
 
+    ``extra`` may carry video_id, extractor, path, playlist and
+    playlist_index.
+    """
     entry = {
+        **extra,
         "title": title,
         "url": url,
         "format": fmt,
@@ -48,7 +246,5 @@ def add_history_entry(title, url, fmt, folder):
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
     }
 
-    # newest first
-    history.insert(0, entry)
-
-    save_history(history)
+    _ensure_writer()
+    _writes.put(entry)
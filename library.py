@@ -0,0 +1,199 @@
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from history import app_dir
+
+LIBRARY_DB = Path(app_dir()) / "library.db"
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    duration REAL,
+    format TEXT,
+    source_url TEXT,
+    title TEXT
+);
+CREATE INDEX IF NOT EXISTS files_root_mtime ON files (root, mtime);
+CREATE INDEX IF NOT EXISTS files_root_name ON files (root, name);
+"""
+
+# Partial downloads and yt-dlp side files are not library items.
+SKIP_SUFFIXES = (".part", ".ytdl", ".tmp", ".temp")
+
+
+class LibraryIndex:
+    """Indexed listing of the files under one download folder.
+
+    File system state is synced by scan(), which only touches rows whose
+    size or mtime changed. Completed downloads are recorded directly with
+    the metadata yt-dlp already had (duration, source URL, title), which a
+    folder scan can't recover. All writes run on one background thread;
+    ``on_change`` is called from that thread after each write.
+    """
+
+    def __init__(self, root, on_change=None):
+        self.root = os.path.abspath(root)
+        self.on_change = on_change
+        # The root and every folder under it, as of the last scan (for
+        # watching them; see ui.main_window).
+        self.folders = [self.root]
+
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library")
+
+    # -------------------------------
+    # Connection
+    # -------------------------------
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(LIBRARY_DB)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _submit(self, fn, *args):
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"Library index update failed: {e}")
+                return
+            if self.on_change:
+                self.on_change()
+        return self._writer.submit(run)
+
+    # -------------------------------
+    # Updates
+    # -------------------------------
+    def set_root(self, root):
+        self.root = os.path.abspath(root)
+        return self.scan()
+
+    def scan(self):
+        """Sync the index with the folder in the background."""
+        return self._submit(self._scan, self.root)
+
+    def record_files(self, files):
+        """Add completed downloads, as returned by download_video."""
+        return self._submit(self._record, self.root, list(files))
+
+    def _scan(self, root):
+        conn = self._connect()
+        known = {
+            row["path"]: (row["size"], row["mtime"])
+            for row in conn.execute("SELECT path, size, mtime FROM files WHERE root = ?", (root,))
+        }
+
+        changed = []
+        folders = [root]
+        for entry in _walk(root, folders):
+            stat = entry.stat()
+            path = os.path.abspath(entry.path)
+            if known.pop(path, None) != (stat.st_size, stat.st_mtime):
+                changed.append((path, root, entry.name, stat.st_size, stat.st_mtime, _ext(entry.name)))
+
+        with conn:
+            # Keeps duration/source_url/title for files that were touched.
+            conn.executemany(
+                "INSERT INTO files (path, root, name, size, mtime, format) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET root = excluded.root, name = excluded.name, "
+                "size = excluded.size, mtime = excluded.mtime",
+                changed,
+            )
+            # Whatever is left in ``known`` is gone from disk.
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in known])
+
+        if root == self.root:
+            self.folders = [os.path.abspath(f) for f in folders]
+
+    def _record(self, root, files):
+        rows = []
+        for f in files:
+            path = os.path.abspath(f["path"])
+            # A job can write outside the library folder (its own output
+            # path); the next scan of that folder picks such files up.
+            if not _is_under(path, root):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            rows.append((
+                path, root, os.path.basename(path), stat.st_size, stat.st_mtime,
+                f.get("duration"), f.get("format") or _ext(path), f.get("url"), f.get("title"),
+            ))
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(path, root, name, size, mtime, duration, format, source_url, title) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def _where(self, search):
+        sql = " WHERE root = ?"
+        params = [self.root]
+        if search:
+            sql += " AND (name LIKE ? OR title LIKE ?)"
+            params += [f"%{search}%"] * 2
+        return sql, params
+
+    def query(self, offset=0, limit=200, search=None):
+        """Newest files first."""
+        where, params = self._where(search)
+        rows = self._connect().execute(
+            f"SELECT * FROM files{where} ORDER BY mtime DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [dict(row) for row in rows]
+
+    def count(self, search=None):
+        where, params = self._where(search)
+        return self._connect().execute(f"SELECT COUNT(*) FROM files{where}", params).fetchone()[0]
+
+
+def _ext(name):
+    return os.path.splitext(name)[1].lstrip(".").lower()
+
+
+def _is_under(path, root):
+    try:
+        return os.path.commonpath([path, root]) == root
+    except ValueError:
+        # Different drives on Windows.
+        return False
+
+
+def _walk(root, folders=None):
+    """Yield the files under ``root``; subfolders found are appended to ``folders``."""
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if folders is not None:
+                folders.append(entry.path)
+            yield from _walk(entry.path, folders)
+        elif entry.is_file() and not entry.name.endswith(SKIP_SUFFIXES):
+            yield entry
@@ -1,20 +1,56 @@
+import multiprocessing
+import os
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
-from utils.updater import start_updater
+import time
+
+# Reference point for the startup benchmark (benchmarks/startup.py).
+_START = time.perf_counter()
+
+# The updater spawns a yt-dlp subprocess; let the window paint first.
+UPDATER_DELAY_MS = 2000
+
+
+def _first_paint_reporter(app):
+    """Event filter that prints the time to the window's first paint, then quits."""
+    from PySide6.QtCore import QObject, QEvent, QTimer
+
+    class FirstPaintReporter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                print(f"YUI_FIRST_PAINT {time.perf_counter() - _START:.4f}", flush=True)
+                obj.removeEventFilter(self)
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    return FirstPaintReporter(app)
 
 
 def main():
+    # Imported here, not at the top: post-processing pool processes are
+    # spawned and re-run this module's top level, and must not load Qt.
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+    from utils.updater import start_updater
+
     app = QApplication(sys.argv)
 
     window = MainWindow()
 
-    start_updater()
+    bench = os.environ.get("YUI_STARTUP_BENCH")
+    if bench:
+        reporter = _first_paint_reporter(app)
+        window.installEventFilter(reporter)
 
     window.show()
 
+    if not bench:
+        QTimer.singleShot(UPDATER_DELAY_MS, start_updater)
+
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
+    # Post-processing pool processes re-enter here in a frozen build.
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,61 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from history import query_history, count_history
+
+PAGE_SIZE = 200
+
+
+def short_text(entry):
+    return f"{entry['title']} ({entry['format']})"
+
+
+class HistoryModel(QAbstractListModel):
+    """History rows fetched page by page from the history store as the view scrolls."""
+
+    def __init__(self, text_fn=short_text, parent=None):
+        super().__init__(parent)
+        self.text_fn = text_fn
+        self.rows = []
+        self.total = 0
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self.rows = []
+        self.total = count_history()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return len(self.rows) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+
+        page = query_history(offset=len(self.rows), limit=PAGE_SIZE)
+        if not page:
+            self.total = len(self.rows)
+            return
+
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.text_fn(self.rows[index.row()])
+        return None
+
+    def entry(self, row):
+        return self.rows[row] if 0 <= row < len(self.rows) else None
@@ -1,5 +1,17 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QListWidget
-from history import load_history
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QListView
+from ui.history_model import HistoryModel
+
+
+def history_text(item):
+    time = (
+        item.get("timestamp")
+        or item.get("time")
+        or "Unknown time"
+    )
+    fmt = item.get("format", "?")
+    title = item.get("title", "Unknown title")
+
+    return f"{time} | {fmt} | {title}"
 
 
 class HistoryWindow(QWidget):
@@ -11,26 +23,14 @@ class HistoryWindow(QWidget):
 
         layout = QVBoxLayout()
 
-        self.list_widget = QListWidget()
+        self.model = HistoryModel(text_fn=history_text)
+
+        self.list_widget = QListView()
+        self.list_widget.setModel(self.model)
+        self.list_widget.setUniformItemSizes(True)
         layout.addWidget(self.list_widget)
 
         self.setLayout(layout)
 
-        self.populate()
-
     def populate(self):
-        history = load_history()
-
-        self.list_widget.clear()
-
-        for item in history:
-            time = (
-                item.get("timestamp")
-                or item.get("time")
-                or "Unknown time"
-            )
-            fmt = item.get("format", "?")
-            title = item.get("title", "Unknown title")
-
-            text = f"{time} | {fmt} | {title}"
-            self.list_widget.addItem(text)
+        self.model.refresh()
@@ -0,0 +1,101 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+PAGE_SIZE = 200
+
+COLUMNS = ("Name", "Size", "Duration", "Format")
+
+
+def format_size(num_bytes):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024 or unit == "GiB":
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class LibraryModel(QAbstractTableModel):
+    """Download-folder files paged in from the LibraryIndex as the view scrolls."""
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.search = None
+        self.rows = []
+        self.total = 0
+        self.refresh()
+
+    def set_search(self, text):
+        self.search = text.strip() or None
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self.rows = []
+        self.total = self.library.count(self.search)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return len(self.rows) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+
+        page = self.library.query(offset=len(self.rows), limit=PAGE_SIZE, search=self.search)
+        if not page:
+            self.total = len(self.rows)
+            return
+
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return row["name"]
+            if column == 1:
+                return format_size(row["size"] or 0)
+            if column == 2:
+                return _duration(row["duration"]) if row["duration"] else ""
+            if column == 3:
+                return row["format"]
+
+        if role == Qt.ToolTipRole:
+            return row["source_url"] or row["path"]
+
+        return None
+
+    def file_path(self, row):
+        return self.rows[row]["path"] if 0 <= row < len(self.rows) else None
@@ -1,11 +1,25 @@
-from PySide6.QtWidgets import QTextEdit
+from PySide6.QtWidgets import QPlainTextEdit
 
-class LogConsole(QTextEdit):
-    def __init__(self):
+# Lines kept on screen; older ones scroll out of the document.
+MAX_LINES = 2000
+
+
+class LogConsole(QPlainTextEdit):
+    def __init__(self, max_lines=MAX_LINES):
         super().__init__()
         self.setReadOnly(True)
+        # Ring buffer: the document drops its first blocks past the limit.
+        self.setMaximumBlockCount(max_lines)
 
     def append_log(self, message):
-        # QTextEdit uses append() for adding plain text lines.
-        self.append(message)
-        self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self.append_logs([message])
+
+    def append_logs(self, messages):
+        bar = self.verticalScrollBar()
+        # Only follow new lines if the user hasn't scrolled up to read.
+        at_bottom = bar.value() >= bar.maximum() - 2
+
+        self.appendPlainText("\n".join(messages))
+
+        if at_bottom:
+            bar.setValue(bar.maximum())
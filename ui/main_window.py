@@ -1,6 +1,4 @@
-import urllib.request
-import tempfile
-import threading
+import functools
 import sys
 import os
 import subprocess
@@ -17,25 +15,34 @@ from PySide6.QtWidgets import (
     QProgressBar,
     QFileDialog,
     QMessageBox,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QTreeView,
-    QFileSystemModel,
     QSplitter,
+    QMenu,
 )
 from PySide6.QtGui import QPixmap, QIcon
-from PySide6.QtCore import Qt, QObject, Signal, QTimer
-
-from downloader.download import get_video_info
-from downloader.queue_manager import DownloadQueueManager
+from PySide6.QtCore import Qt, QObject, Signal, QTimer, QFileSystemWatcher
+
+from downloader.download import iter_preview, metadata_cache_stats, ydl_pool
+from downloader.queue_manager import DownloadQueueManager, PRIORITY_HIGH
+from downloader.journal import QueueJournal
+from downloader.bandwidth import rate_setting, scheduler_from_settings
+from downloader.postprocess import PostProcessingPool, DEFAULT_POSTPROCESS_WORKERS
+from downloader.archive import DownloadArchive
+from downloader.metrics import MetricsRegistry
+from downloader.profiling import profiler_from_settings
 from settings import load_settings, save_settings
-from history import add_history_entry
+from history import add_history_entry, app_dir
+from library import LibraryIndex
 from ui.history_window import HistoryWindow
 from ui.theme import DARK_THEME
-from ui.queue_item import QueueItemWidget
+from ui.queue_model import QueueModel, QueueItemDelegate, JobIdRole
+from ui.history_model import HistoryModel
+from ui.library_model import LibraryModel, format_size
 from ui.log_console import LogConsole
-from utils.logger import LogHandler
-from history import load_history
+from ui.thumbnails import ThumbnailService
+from ui.preview_fetcher import PreviewFetcher
+from utils.logger import LogHandler, start_log_pipeline
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and PyInstaller."""
@@ -47,14 +54,49 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+@functools.lru_cache(maxsize=None)
+def load_theme():
+    with open(resource_path("ui/themes/dark.qss"), "r") as f:
+        return f.read()
+
+
+# Playlist entries listed under the preview title.
+PREVIEW_TITLES = 5
+
+
+def playlist_text(title, count, first_titles):
+    lines = [f"Playlist: {title} ({count} videos)"]
+    lines += [f"  {t}" for t in first_titles]
+    return "\n".join(lines)
+
+
+def progress_detail(state):
+    if state.get("phase") == "processing":
+        return "Converting"
+    parts = []
+    if state.get("total_bytes"):
+        parts.append(f"{format_size(state.get('downloaded_bytes') or 0)} / {format_size(state['total_bytes'])}")
+    elif state.get("downloaded_bytes"):
+        parts.append(format_size(state["downloaded_bytes"]))
+    if state.get("speed"):
+        parts.append(f"{format_size(state['speed'])}/s")
+    if state.get("eta"):
+        minutes, seconds = divmod(int(state["eta"]), 60)
+        parts.append(f"ETA {minutes}:{seconds:02d}")
+    return ", ".join(parts)
+
+
 # ---------------- Signals ----------------
 class ProgressSignals(QObject):
-    progress = Signal(str, float)
+    progress_batch = Signal(object) # {job id: progress state}, ~10 per second
     status = Signal(str)
     error = Signal(str)
-    thumbnail = Signal(QPixmap)
-    queue_update = Signal(str, str) # status, title
-    finished = Signal(str, object, object) # title, playlist, index
+    preview = Signal(str, str) # url, text
+    thumbnail = Signal(str, str) # url, thumbnail url
+    queue_update = Signal(str, str, str) # status, job id, title
+    renamed = Signal(str, str) # job id, resolved title
+    library_changed = Signal()
+    finished = Signal(str, str, object, object, object) # job id, title, playlist, index, job details
 
 # ---------------- Main Window ----------------
 class MainWindow(QWidget):
@@ -120,10 +162,11 @@ class MainWindow(QWidget):
 
         # Signals
         self.signals = ProgressSignals()
-        self.signals.progress.connect(self.update_progress)
+        self.signals.progress_batch.connect(self.update_progress)
         self.signals.status.connect(self.update_status)
         self.signals.error.connect(self.show_error)
         self.signals.queue_update.connect(self.update_queue_ui)
+        self.signals.renamed.connect(self.rename_queue_item)
         self.signals.finished.connect(self.on_video_finished)
 
         # Backgroud
@@ -135,20 +178,6 @@ class MainWindow(QWidget):
         pixmap = QPixmap(resource_path(bg_path))
         self.bg_label.setPixmap(pixmap)
         
-        # Download folder view 
-        self.file_model = QFileSystemModel()
-        self.file_model.setRootPath("")
-
-        self.file_view = QTreeView()
-        self.file_view.setModel(self.file_model)
-        self.file_view.setRootIndex(
-            self.file_model.index(self.download_path)
-        )
-        self.file_view.setMaximumWidth(400)
-
-        #double click to open file location
-        self.file_view.doubleClicked.connect(self.open_selected_file)
-
         # ----- RIGHT panel (main downloader controls) -----
         self.panel = QWidget(self)
 
@@ -169,10 +198,10 @@ class MainWindow(QWidget):
                 border-radius: 12px;}
             """)
         
-        with open(resource_path("ui/themes/dark.qss"), "r") as f:
-            self.file_panel.setStyleSheet(
-                self.file_panel.styleSheet() + f.read()
-            )
+        # Read once and shared by all three panels.
+        theme = load_theme()
+
+        self.file_panel.setStyleSheet(self.file_panel.styleSheet() + theme)
 
         # ----- Logger panel (below LEFT panel) -----
         # Dedicated container so the log console can sit below the downloads/history panel.
@@ -191,46 +220,61 @@ class MainWindow(QWidget):
         log_layout.addWidget(self.console)
 
         handler = LogHandler()
-        handler.setFormatter(logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(message)s",
-            "%H:%M:%S"
-        ))
+        handler.log_batch.connect(self.console.append_logs)
 
-        handler.log_signal.connect(self.console.append_log)
-
-        root_logger = logging.getLogger()
-        root_logger.addHandler(handler)
-        root_logger.setLevel(logging.INFO)
+        # Records go through a queue; a listener thread feeds the console
+        # (in batches) and the rotating log file ("log_file": null turns it off).
+        log_file = self.settings.get("log_file", "yui.log")
+        self.log_listener = start_log_pipeline(
+            handler, os.path.join(app_dir(), log_file) if log_file else None
+        )
         self.logger.info("Log console initialized.")
 
         # Load theme onto the RIGHT panel.
-        with open(resource_path("ui/themes/dark.qss"), "r") as f:
-            self.panel.setStyleSheet(
-                self.panel.styleSheet() + f.read()
-            )
+        self.panel.setStyleSheet(self.panel.styleSheet() + theme)
 
         # Load the same theme onto the logger panel.
-        with open(resource_path("ui/themes/dark.qss"), "r") as f:
-            self.log_panel.setStyleSheet(
-                self.log_panel.styleSheet() + f.read()
-            )
+        self.log_panel.setStyleSheet(self.log_panel.styleSheet() + theme)
 
         # Layout for the RIGHT panel.
         layout = QVBoxLayout(self.panel)
 
         file_layout = QVBoxLayout(self.file_panel)
 
-        self.file_model = QFileSystemModel()
-        self.file_model.setRootPath("")
+        # Download folder view, backed by an index of the download folder
+        # rather than a whole-filesystem QFileSystemModel.
+        self.library = LibraryIndex(
+            self.download_path, on_change=self.signals.library_changed.emit
+        )
+        self.file_model = LibraryModel(self.library)
+        self.signals.library_changed.connect(self.file_model.refresh)
+        self.signals.library_changed.connect(self.sync_library_watcher)
+
+        self.library_search = QLineEdit()
+        self.library_search.setPlaceholderText("Search downloads")
+        self.library_search.textChanged.connect(self.file_model.set_search)
+        file_layout.addWidget(self.library_search)
 
         self.file_view = QTreeView()
         self.file_view.setModel(self.file_model)
-        self.file_view.setRootIndex(
-            self.file_model.index(self.download_path)
-        )
+        self.file_view.setRootIsDecorated(False)
+        self.file_view.setUniformRowHeights(True)
+
+        #double click to open file location
+        self.file_view.doubleClicked.connect(self.open_selected_file)
 
         file_layout.addWidget(self.file_view)
 
+        # Rescan (incrementally) shortly after the folder changes on disk.
+        self.library_watcher = QFileSystemWatcher()
+        self.library_scan_timer = QTimer()
+        self.library_scan_timer.setSingleShot(True)
+        self.library_scan_timer.timeout.connect(self.library.scan)
+        self.library_watcher.directoryChanged.connect(
+            lambda _: self.library_scan_timer.start(1000)
+        )
+        self.watch_download_folder()
+
         # Explicit geometry:
         # RIGHT panel occupies the right half.
         # LEFT panel starts at the same top y-position (0).
@@ -240,11 +284,15 @@ class MainWindow(QWidget):
         self.log_panel.setGeometry(60, 560, 650, 340)
 
         # LEFT panel subview: history list, toggled with file tree view.
-        self.history_list = QListWidget()
+        # Rows are paged in from the history store as the list scrolls.
+        self.history_model = HistoryModel()
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setUniformItemSizes(True)
         file_layout.addWidget(self.history_list)
         self.history_list.hide()
 
-        self.history_list.itemDoubleClicked.connect(
+        self.history_list.doubleClicked.connect(
             self.open_history_location
         )
 
@@ -268,15 +316,68 @@ class MainWindow(QWidget):
 
         layout.addLayout(preview_layout)
 
-        self.signals.thumbnail.connect(self.thumbnail_label.setPixmap)
+        self.thumbnails = ThumbnailService(os.path.join(app_dir(), "cache", "thumbs"))
+        self.thumbnails.ready.connect(self.show_thumbnail)
+        self.thumbnail_url = None
+        self.signals.preview.connect(self.show_preview)
+        self.signals.thumbnail.connect(self.load_thumbnail)
+        self.preview_fetcher = PreviewFetcher(self.fetch_preview)
 
         # ----- Queue List -----
-        self.queue_list = QListWidget()
+        self.queue_model = QueueModel()
+        self.queue_list = QListView()
+        self.queue_list.setModel(self.queue_model)
+        self.queue_list.setItemDelegate(QueueItemDelegate(self.queue_list))
+        self.queue_list.setUniformItemSizes(True)
+        self.queue_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.queue_list.customContextMenuRequested.connect(self.show_queue_menu)
         layout.addWidget(self.queue_list, stretch=1)
-        self.queue_widgets = {}
 
         # ----- Queue Manager -----
-        self.queue_manager = DownloadQueueManager(self.signals)
+        # Videos already downloaded are skipped unless turned off in config.json.
+        archive = None
+        if self.settings.get("skip_downloaded", True):
+            archive = DownloadArchive(os.path.join(app_dir(), "archive.db"))
+            if self.settings.get("download_archive"):
+                try:
+                    archive.import_file(self.settings["download_archive"])
+                except OSError as e:
+                    self.logger.error(f"Could not import download archive: {e}")
+
+        # Per-download cap; a malformed value is logged and ignored.
+        self.job_rate = rate_setting(self.settings, "max_job_rate")
+
+        self.queue_manager = DownloadQueueManager(
+            self.signals,
+            max_workers=self.settings.get("max_concurrent_downloads", 3),
+            per_host_limit=self.settings.get("max_downloads_per_host"),
+            journal=QueueJournal(os.path.join(app_dir(), "queue_journal.jsonl")),
+            bandwidth=scheduler_from_settings(self.settings),
+            # FFmpeg merges/conversions run here, off the download workers.
+            postprocessor=PostProcessingPool(
+                self.settings.get("max_postprocess_workers", DEFAULT_POSTPROCESS_WORKERS)
+            ),
+            archive=archive,
+            # Phase timings, written to metrics/metrics.json and metrics.prom.
+            metrics=MetricsRegistry(os.path.join(app_dir(), "metrics")),
+            # Off unless "profiling" is set in config.json or YUI_PROFILE=1;
+            # summaries show up in the log console.
+            profiler=profiler_from_settings(self.settings, os.path.join(app_dir(), "profiles")),
+        )
+
+        # Optional localhost control API feeding this same queue.
+        self.control_server = None
+        if self.settings.get("api_port"):
+            from api import ControlServer
+            self.control_server = ControlServer(
+                self.queue_manager,
+                self.signals,
+                self.download_path,
+                port=self.settings["api_port"],
+                rate_limit=self.job_rate,
+                token=self.settings.get("api_token"),
+            )
+            self.control_server.start()
 
         # ----- Format selector -----
         self.format_box = QComboBox()
@@ -318,11 +419,26 @@ class MainWindow(QWidget):
 
         self.url_input.textChanged.connect(self.schedule_info_fetch)
 
+        # Bring back whatever was queued or downloading when the app last closed.
+        restored = self.queue_manager.restore()
+        if restored:
+            self.logger.info(f"Restored {restored} unfinished downloads")
+
     # ---------------- Resize background ----------------
     def resizeEvent(self, event):
         self.bg_label.resize(self.size())
         super().resizeEvent(event)
 
+    def closeEvent(self, event):
+        # Pooled YoutubeDL instances hold the shared cookie jar; write it back.
+        ydl_pool.close()
+        # Unfinished post-processing is redone from the journal next time.
+        self.queue_manager.close()
+        self.queue_manager.metrics.write()
+        # Last, so everything logged above still reaches the file.
+        self.log_listener.stop()
+        super().closeEvent(event)
+
     # ---------------- Change background ----------------
     def change_background(self):
         file, _ = QFileDialog.getOpenFileName(
@@ -340,22 +456,40 @@ class MainWindow(QWidget):
             self.bg_label.setPixmap(pixmap)
 
     # ---------------- Update queue UI ----------------
-    def update_queue_ui(self, status, title):
+    def update_queue_ui(self, status, job_id, title):
+        if job_id not in self.queue_model:
+            if status == "Removed":
+                return
+            self.queue_model.add(job_id, title)
+
         if status == "Queued":
-            widget = QueueItemWidget(title)
+            self.queue_model.set_status(job_id, "")
 
-            item = QListWidgetItem(self.queue_list)
-            item.setSizeHint(widget.sizeHint())
+        elif status == "Starting":
+            self.queue_model.set_status(job_id, "Downloading")
 
-            self.queue_list.addItem(item)
-            self.queue_list.setItemWidget(item, widget)
+        elif status in ("Processing", "Paused", "Retrying", "Failed", "Cancelled", "Skipped"):
+            self.queue_model.set_status(job_id, status)
 
-            self.queue_widgets[title] = widget
+        elif status == "Removed":
+            self.queue_model.remove(job_id)
 
-        elif status == "Starting":
-            widget = self.queue_widgets.get(title)
-            if widget:
-                widget.set_status(f"Downloading: {title}")
+    def rename_queue_item(self, job_id, title):
+        self.queue_model.rename(job_id, title)
+
+    def show_queue_menu(self, pos):
+        index = self.queue_list.indexAt(pos)
+        if not index.isValid():
+            return
+        job_id = index.data(JobIdRole)
+
+        menu = QMenu(self)
+        menu.addAction("Pause", lambda: self.queue_manager.pause(job_id))
+        menu.addAction("Resume", lambda: self.queue_manager.resume(job_id))
+        menu.addAction("Download next", lambda: self.queue_manager.set_priority(job_id, PRIORITY_HIGH))
+        menu.addSeparator()
+        menu.addAction("Cancel", lambda: self.queue_manager.cancel(job_id))
+        menu.exec(self.queue_list.viewport().mapToGlobal(pos))
     
     # ---------------- Folder selection ----------------
     def choose_folder(self):
@@ -366,8 +500,32 @@ class MainWindow(QWidget):
             self.settings["download_path"] = folder
             save_settings(self.settings)
             self.logger.info(f"Download folder set: {folder}")
+            if self.control_server:
+                self.control_server.output_path = folder
+
+            self.watch_download_folder()
 
-            self.file_view.setRootIndex(self.file_model.index(folder))
+    def watch_download_folder(self):
+        os.makedirs(self.download_path, exist_ok=True)
+
+        watched = self.library_watcher.directories()
+        if watched:
+            self.library_watcher.removePaths(watched)
+        self.library_watcher.addPath(os.path.abspath(self.download_path))
+
+        # The scan finds the subfolders; sync_library_watcher adds them.
+        self.library.set_root(self.download_path)
+        self.file_model.refresh()
+
+    def sync_library_watcher(self):
+        # scan() indexes the whole tree, so watch every folder in it
+        # (playlist folders included), not just the top level.
+        wanted = set(self.library.folders)
+        watched = set(self.library_watcher.directories())
+        if watched - wanted:
+            self.library_watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.library_watcher.addPaths(list(wanted - watched))
 
     # ---------------- History ----------------
     def show_history(self):
@@ -377,12 +535,14 @@ class MainWindow(QWidget):
     # LEFT panel mode: show downloads tree.
     def show_downloads(self):
         self.history_list.hide()
+        self.library_search.show()
         self.file_view.show()
         self._highlight_toolbar(self.toggle_files_btn)
 
     # LEFT panel mode: show history list.
     def show_history_panel(self):
         self.file_view.hide()
+        self.library_search.hide()
         self.history_list.show()
         self.populate_history()
         self._highlight_toolbar(self.toolbar_history_btn)
@@ -400,37 +560,27 @@ class MainWindow(QWidget):
             }
         """)
 
-    def open_history_location(self, item):
-        history = load_history()
-        row = self.history_list.row(item)
-
-        if row >= len(history):
+    def open_history_location(self, index):
+        entry = self.history_model.entry(index.row())
+        if not entry:
             return
 
-        entry = history[::-1][row] #reverse order
-
         path = entry.get("path")
-        if not path:
+        folder = os.path.dirname(path) if path else entry.get("folder")
+        if not folder:
             return
-        
-        folder = os.path.dirname(path)
 
         if os.path.exists(folder):
             subprocess.Popen(f'explorer "{folder}"')
 
     def open_selected_file(self, index):
-        path = self.file_model.filePath(index)
+        path = self.file_model.file_path(index.row())
 
-        if os.path.isfile(path):
+        if path and os.path.isfile(path):
             os.startfile(path)
 
     def populate_history(self):
-        self.history_list.clear()
-
-        history = load_history()
-        for item in history:
-            text = f"{item['title']} ({item['format']})"
-            self.history_list.addItem(text)
+        self.history_model.refresh()
 
     # Open download folder
     def open_download_folder(self):
@@ -439,32 +589,40 @@ class MainWindow(QWidget):
             os.startfile(self.download_path)
 
     # ---------------- Progress updates ----------------
-    def update_progress(self, title, value):
-        widget = self.queue_widgets.get(title)
-
-        if widget:
-            widget.set_progress(value)
+    def update_progress(self, batch):
+        for job_id, state in batch.items():
+            self.queue_model.set_progress(
+                job_id, state["percent"], progress_detail(state)
+            )
 
-        self.progress_bar.setValue(int(value))
+        # Unknown size: keep the bar where it is.
+        if state["percent"] is not None:
+            self.progress_bar.setValue(int(state["percent"]))
 
     def update_status(self, text):
         self.status_label.setText(text)
 
     # ---------------- Download finished callback ----------------
-    def on_video_finished(self, title, playlist, index):
-        url = self.url_input.text().strip()
-        fmt = self.format_box.currentText()
-
+    def on_video_finished(self, job_id, title, playlist, index, details):
         if playlist:
             display_title = f"{playlist} → {title}"
         else:
             display_title = title
 
+        files = details.get("files") or []
+        self.library.record_files(files)
+
+        # Queued onto the history writer thread; never blocks the GUI.
         add_history_entry(
             display_title,
-            url,
-            fmt,
-            self.download_path,
+            details["url"],
+            details["format"],
+            details["folder"],
+            video_id=details.get("video_id"),
+            extractor=details.get("extractor"),
+            playlist=playlist,
+            playlist_index=index,
+            path=files[0]["path"] if files else None,
         )
 
         # Real completion point emitted by queue worker after yt-dlp finishes.
@@ -482,6 +640,8 @@ class MainWindow(QWidget):
         if "youtube.com" not in text and "youtu.be" not in text:
             self.title_label.setText("Video: -")
             self.thumbnail_label.clear()
+            self.thumbnail_url = None
+            self.preview_fetcher.cancel()
             return
 
         if not self.download_btn.isEnabled():
@@ -497,50 +657,81 @@ class MainWindow(QWidget):
         if not url:
             return
 
-        def run():
-            try:
-                self.logger.info(f"Fetching video info for URL: {url}")
-                info = get_video_info(url)
-                thumb_url = info.get("thumbnail")
-
-                if thumb_url:
-                    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-                    urllib.request.urlretrieve(thumb_url, tmp_file.name)
-
-                    pixmap = QPixmap(tmp_file.name)
-
-                    if not pixmap.isNull():
-                        scaled = pixmap.scaled(
-                            320, 180,
-                            Qt.KeepAspectRatio,
-                            Qt.SmoothTransformation
-                        )
-
-                        self.signals.thumbnail.emit(scaled)
-
-                if info.get("_type") == "playlist":
-                    entries = info.get("entries") or []
-                    entries = list(entries)
-
-                    count = len(entries)
-                    title = info.get("title", "Playlist")
-
-                    self.title_label.setText(
-                        f"Playlist: {title} ({count} videos)"
-                    )
-                    self.logger.info(
-                        f"Fetched playlist info: {title} ({count} videos)"
-                    )
-                else:
+        self.preview_fetcher.request(url)
+
+    # Runs on the preview fetcher's thread; stops once the URL is superseded.
+    def fetch_preview(self, url, is_current):
+        try:
+            self.logger.info(f"Fetching video info for URL: {url}")
+            count = 0
+            first_titles = []
+
+            for info, entries in iter_preview(url):
+                if not is_current():
+                    self.logger.info(f"Preview superseded, stopped: {url}")
+                    return
+
+                if entries is None:
+                    self.signals.thumbnail.emit(url, info.get("thumbnail") or "")
+
                     title = info.get("title", "Unknown title")
-                    self.title_label.setText(f"Video: {title}")
+                    self.signals.preview.emit(url, f"Video: {title}")
                     self.logger.info(f"Fetched video info: {title}")
+                    break
+
+                if not count:
+                    thumbnails = info.get("thumbnails") or []
+                    if thumbnails:
+                        self.signals.thumbnail.emit(url, thumbnails[-1].get("url") or "")
+
+                # Only the running count and a handful of titles are
+                # kept, however long the playlist is.
+                count += len(entries)
+                for entry in entries:
+                    if len(first_titles) < PREVIEW_TITLES:
+                        first_titles.append(entry.get("title") or entry.get("url"))
+
+                title = info.get("title", "Playlist")
+                total = info.get("playlist_count") or f"{count}+"
+                self.signals.preview.emit(
+                    url, playlist_text(title, total, first_titles)
+                )
+
+            if count:
+                self.signals.preview.emit(
+                    url, playlist_text(title, count, first_titles)
+                )
+                self.logger.info(
+                    f"Fetched playlist info: {title} ({count} videos)"
+                )
+
+            stats = metadata_cache_stats()
+            self.logger.info(
+                f"Metadata cache: {stats['hits'] + stats['disk_hits']} hits, "
+                f"{stats['misses']} misses"
+            )
+
+        except Exception as e:
+            self.signals.preview.emit(url, "Could not fetch info")
+            self.logger.error(f"Failed to fetch video info: {e}")
+
+    def show_preview(self, url, text):
+        # A late result for a URL the user has already replaced is dropped.
+        if self.preview_fetcher.is_current(url):
+            self.title_label.setText(text)
 
-            except Exception as e:
-                self.title_label.setText("Could not fetch info")
-                self.logger.error(f"Failed to fetch video info: {e}")
+    def load_thumbnail(self, url, thumb_url):
+        # Set here on the GUI thread, which is also where show_thumbnail
+        # compares against it; skipped if the preview has moved on.
+        if not self.preview_fetcher.is_current(url):
+            return
+        self.thumbnail_url = thumb_url or None
+        self.thumbnails.request(thumb_url)
 
-        threading.Thread(target=run, daemon=True).start()
+    def show_thumbnail(self, thumb_url, image):
+        # Ignore thumbnails for a URL the preview has moved away from.
+        if thumb_url == self.thumbnail_url:
+            self.thumbnail_label.setPixmap(QPixmap.fromImage(image))
 
     # ---------------- Download ----------------
     def start_download(self):
@@ -553,25 +744,14 @@ class MainWindow(QWidget):
         self.logger.info(
             f"Starting download | format - {fmt} | path - {self.download_path}"
         )
-        self.download_btn.setEnabled(False)
         self.progress_bar.setValue(0)
-        self.signals.status.emit("Downloading...")
-
-        def run():
-            try:
-                self.queue_manager.add(
-                    url, self.download_path, fmt
-                    )    
-
-                # Added to queue/started by queue manager; completion is logged in on_video_finished.
-                self.signals.status.emit("Queued")
-
-            except Exception as e:
-                self.signals.status.emit("Download failed")
-                self.signals.error.emit(str(e))
-                self.logger.error(f"Download failed: {e}")
 
-            finally:
-                self.download_btn.setEnabled(True)
+        try:
+            # Returns immediately; metadata is resolved by the queue manager.
+            self.queue_manager.add(url, self.download_path, fmt, rate_limit=self.job_rate)
+            self.signals.status.emit("Queued")
 
-        threading.Thread(target=run, daemon=True).start()
+        except Exception as e:
+            self.signals.status.emit("Download failed")
+            self.signals.error.emit(str(e))
+            self.logger.error(f"Download failed: {e}")
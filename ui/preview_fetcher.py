@@ -0,0 +1,54 @@
+import threading
+
+
+class PreviewFetcher:
+    """Runs at most one preview extraction at a time.
+
+    request() while a fetch is active only remembers the newest URL; it is
+    started when the active one ends, and anything requested in between is
+    dropped. A request for the URL already in flight just reuses that
+    fetch. ``fetch(url, is_current)`` should poll ``is_current()`` between
+    steps and stop early once it returns False.
+    """
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+
+        self._lock = threading.Lock()
+        self._latest = None
+        self._active = None
+        self._pending = None
+
+    def request(self, url):
+        with self._lock:
+            self._latest = url
+
+            if self._active is not None:
+                # Same URL already in flight: its result is current again.
+                self._pending = None if url == self._active else url
+                return
+
+            self._active = url
+
+        self._start(url)
+
+    def cancel(self):
+        """Mark every in-flight or queued fetch as superseded."""
+        with self._lock:
+            self._latest = None
+            self._pending = None
+
+    def is_current(self, url):
+        return url is not None and url == self._latest
+
+    def _start(self, url):
+        threading.Thread(target=self._run, args=(url,), daemon=True).start()
+
+    def _run(self, url):
+        while url is not None:
+            try:
+                self.fetch(url, lambda: self.is_current(url))
+            finally:
+                with self._lock:
+                    url, self._pending = self._pending, None
+                    self._active = url
@@ -0,0 +1,127 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize
+from PySide6.QtWidgets import (
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionProgressBar,
+)
+
+ProgressRole = Qt.UserRole + 1
+JobIdRole = Qt.UserRole + 2
+
+ROW_HEIGHT = 48
+
+
+class QueueModel(QAbstractListModel):
+    """One small [job id, title, status, progress, detail] record per job.
+
+    Rows are keyed by job id, matching the signals emitted by
+    DownloadQueueManager, so jobs with the same title stay apart. Nothing
+    per row is a widget; the delegate paints the progress bar.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.index_of = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        job_id, title, status, progress, detail = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            text = f"{status}: {title}" if status else title
+            return f"{text}  ({detail})" if detail else text
+        if role == ProgressRole:
+            return progress
+        if role == JobIdRole:
+            return job_id
+        return None
+
+    def __contains__(self, job_id):
+        return job_id in self.index_of
+
+    # ---------------- Updates ----------------
+    def add(self, job_id, title):
+        row = len(self.rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.append([job_id, title, "", 0.0, ""])
+        self.index_of[job_id] = row
+        self.endInsertRows()
+
+    def remove(self, job_id):
+        row = self.index_of.pop(job_id, None)
+        if row is None:
+            return
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+
+        for i in range(row, len(self.rows)):
+            self.index_of[self.rows[i][0]] = i
+
+    def rename(self, job_id, title):
+        row = self.index_of.get(job_id)
+        if row is not None:
+            self.rows[row][1] = title
+            self._changed(row)
+
+    def set_status(self, job_id, status):
+        row = self.index_of.get(job_id)
+        if row is not None:
+            self.rows[row][2] = status
+            self._changed(row)
+
+    def set_progress(self, job_id, value, detail=""):
+        row = self.index_of.get(job_id)
+        if row is not None:
+            if value is not None:
+                self.rows[row][3] = value
+            self.rows[row][4] = detail
+            self._changed(row)
+
+    def _changed(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+
+class QueueItemDelegate(QStyledItemDelegate):
+    """Paints the title line and a progress bar for each queue row."""
+
+    def paint(self, painter, option, index):
+        painter.save()
+
+        rect = option.rect.adjusted(6, 4, -6, -4)
+        text_rect = QRect(rect.left(), rect.top(), rect.width(), rect.height() // 2)
+        bar_rect = QRect(rect.left(), text_rect.bottom() + 2, rect.width(), rect.height() // 2 - 2)
+
+        painter.drawText(
+            text_rect,
+            Qt.AlignLeft | Qt.AlignVCenter,
+            option.fontMetrics.elidedText(
+                index.data(Qt.DisplayRole), Qt.ElideRight, text_rect.width()
+            ),
+        )
+
+        bar = QStyleOptionProgressBar()
+        bar.rect = bar_rect
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = int(index.data(ProgressRole) or 0)
+        bar.textVisible = False
+        bar.state = option.state | QStyle.State_Horizontal
+
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, bar, painter, option.widget)
+
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), ROW_HEIGHT)
@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PySide6.QtCore import Qt, QObject, Signal
+from PySide6.QtGui import QImage
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailService(QObject):
+    """Fetches, decodes and scales thumbnails off the GUI thread.
+
+    Raw image bytes are kept in a size-bounded directory keyed by URL, and
+    the scaled QImages in a small in-memory LRU, so a repeat preview is
+    served without touching the network or the decoder. ``ready`` is
+    emitted with the URL and scaled image; turn it into a QPixmap on the
+    GUI thread.
+    """
+
+    ready = Signal(str, QImage)
+
+    def __init__(self, cache_dir, width=320, height=180,
+                 max_disk_bytes=50 * 1024 * 1024, max_memory_entries=64):
+        super().__init__()
+        self.cache_dir = Path(cache_dir)
+        self.width = width
+        self.height = height
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnail")
+
+    def request(self, url):
+        if not url:
+            return
+
+        with self._lock:
+            image = self._memory.get(url)
+            if image is not None:
+                self._memory.move_to_end(url)
+
+        if image is not None:
+            self.ready.emit(url, image)
+            return
+
+        self._executor.submit(self._load, url)
+
+    def _load(self, url):
+        try:
+            data = self._read_bytes(url)
+
+            image = QImage.fromData(data)
+            if image.isNull():
+                return
+
+            image = image.scaled(
+                self.width, self.height,
+                Qt.KeepAspectRatio,
+                Qt.SmoothTransformation
+            )
+
+            with self._lock:
+                self._memory[url] = image
+                self._memory.move_to_end(url)
+                while len(self._memory) > self.max_memory_entries:
+                    self._memory.popitem(last=False)
+
+            self.ready.emit(url, image)
+
+        except Exception as e:
+            logger.warning(f"Could not load thumbnail: {e}")
+
+    def _read_bytes(self, url):
+        path = self.cache_dir / hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+        if path.exists():
+            # Touch so pruning treats it as recently used.
+            os.utime(path)
+            return path.read_bytes()
+
+        with urllib.request.urlopen(url, timeout=20) as response:
+            data = response.read()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        self._prune()
+
+        return data
+
+    def _prune(self):
+        files = [f for f in os.scandir(self.cache_dir) if f.is_file()]
+        total = sum(f.stat().st_size for f in files)
+        if total <= self.max_disk_bytes:
+            return
+
+        files.sort(key=lambda f: f.stat().st_mtime)
+        for f in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                total -= f.stat().st_size
+                os.remove(f.path)
+            except OSError:
+                pass
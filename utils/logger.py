@@ -1,13 +1,110 @@
 import logging
-from PySide6.QtCore import QObject, Signal
+import queue
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# Console lines are handed to the GUI at most this often (ms).
+FLUSH_INTERVAL_MS = 100
+
+# Lines held for the console between flushes; older ones are dropped if
+# the GUI falls behind.
+MAX_PENDING_LINES = 5000
+
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
 
 class LogHandler(logging.Handler, QObject):
-    log_signal = Signal(str)
+    """Collects formatted records and hands them to the GUI in batches.
 
-    def __init__(self):
+    emit() only appends to a bounded buffer, so it is cheap from any
+    thread; log_batch carries everything buffered since the last flush,
+    at most every FLUSH_INTERVAL_MS. Create it on the GUI thread.
+    """
+
+    log_batch = Signal(list)
+    # Queued into the GUI thread to start the flush timer there.
+    _wake = Signal()
+
+    def __init__(self, interval_ms=FLUSH_INTERVAL_MS, max_pending=MAX_PENDING_LINES):
         logging.Handler.__init__(self)
         QObject.__init__(self)
+        self.interval_ms = interval_ms
+
+        self._pending = deque(maxlen=max_pending)
+        self._pending_lock = threading.Lock()
+        self._scheduled = False
+        self._dropped = 0
+
+        self._wake.connect(self._schedule)
 
     def emit(self, record):
-        msg = self.format(record)
-        self.log_signal.emit(msg)
\ No newline at end of file
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._pending_lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(msg)
+            wake = not self._scheduled
+            self._scheduled = True
+
+        if wake:
+            self._wake.emit()
+
+    def _schedule(self):
+        QTimer.singleShot(self.interval_ms, self._flush)
+
+    def _flush(self):
+        with self._pending_lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            self._scheduled = False
+
+        if dropped:
+            lines.insert(0, f"... {dropped} log lines dropped ...")
+        if lines:
+            self.log_batch.emit(lines)
+
+
+def start_log_pipeline(console_handler, log_file=None, level=logging.INFO,
+                       max_bytes=LOG_FILE_MAX_BYTES, backup_count=LOG_FILE_BACKUPS):
+    """Route the root logger through a queue to the console and a log file.
+
+    Logging threads only put records on a queue; a QueueListener thread
+    formats them and feeds ``console_handler`` and, with ``log_file``, a
+    RotatingFileHandler, so file writes never block a download or the
+    GUI. Returns the listener; call stop() on it at exit to flush.
+    """
+    formatter = logging.Formatter(LOG_FORMAT, "%H:%M:%S")
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+
+    if log_file:
+        try:
+            file_handler = RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+        except OSError as e:
+            logging.getLogger(__name__).error(f"Could not open log file {log_file}: {e}")
+        else:
+            file_handler.setFormatter(logging.Formatter(LOG_FORMAT, "%Y-%m-%d %H:%M:%S"))
+            handlers.append(file_handler)
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(QueueHandler(records))
+    root_logger.setLevel(level)
+    return listener